@@ -1,11 +1,20 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, date
-from io import BytesIO
 import os
+import tempfile
+import uuid
 from datetime import timedelta
 import streamlit_cookies_manager
-from backend import MuscleTrackerBackend
+from backend import CachedMuscleTrackerBackend
+from meal_cart import get_cart_store
+from instrumentation import start_rerun
+
+# Shows the debug panel (cache hit ratios) in the sidebar
+DEBUG_PANEL = os.environ.get('MUSCLE_TRACKER_DEBUG', '').lower() in ('1', 'true', 'yes')
+
+# Usernames (comma-separated) that see the profiling panel
+ADMIN_USERS = {name.strip() for name in os.environ.get('MUSCLE_TRACKER_ADMIN_USERS', '').split(',') if name.strip()}
 
 # Page configuration
 st.set_page_config(
@@ -49,7 +58,10 @@ st.markdown("""
 
 class MuscleTrackerApp:
     def __init__(self):
-        self.backend = MuscleTrackerBackend()
+        # Reads are memoized per user until one of that user's writes goes through the backend
+        self.backend = CachedMuscleTrackerBackend()
+        # Meal builder carts live outside session_state, as (food_id, quantity) arrays per browser session
+        self.cart_store = get_cart_store()
         self.cookies = streamlit_cookies_manager.CookieManager()
         self.initialize_session_state()
     
@@ -63,19 +75,31 @@ class MuscleTrackerApp:
             st.session_state.selected_date = date.today().isoformat()
         if 'meal_items' not in st.session_state:
             st.session_state.meal_items = []
-        if 'meal_builder_items' not in st.session_state:
-            st.session_state.meal_builder_items = []
         if 'form_success' not in st.session_state:
             st.session_state.form_success = False
         if 'recently_imported_foods' not in st.session_state:
             st.session_state.recently_imported_foods = None
+        if 'import_resume' not in st.session_state:
+            st.session_state.import_resume = {}  # kind -> (file name, row to resume from)
         if 'reset_quantity' not in st.session_state:
             st.session_state.reset_quantity = False
         if 'meal_item_quantity' not in st.session_state:
             st.session_state.meal_item_quantity = 1.0
+        if 'cart_key' not in st.session_state:
+            st.session_state.cart_key = ''
+
+    def cart_key(self):
+        """This browser session's cart: the user id plus an id made once per session, so two tabs
+        or devices of the same user each build their own meal"""
+        if not st.session_state.cart_key.startswith(f"{st.session_state.user.id}:"):
+            st.session_state.cart_key = f"{st.session_state.user.id}:{uuid.uuid4().hex}"
+        return st.session_state.cart_key
     
     def run(self):
         """Main application runner"""
+        # Collect the backend calls of this rerun for the profiling panel
+        self.rerun_calls = start_rerun()
+
         # Header
         st.markdown('<h1 class="main-header"> Diet Tracker</h1>', unsafe_allow_html=True)
         
@@ -178,11 +202,16 @@ class MuscleTrackerApp:
                 self.backend.delete_remember_me_token(token)
                 if 'remember_me_token' in self.cookies:
                     del self.cookies['remember_me_token']
+                self.cart_store.delete(self.cart_key())
+                st.session_state.cart_key = ''
                 st.session_state.user = None
                 st.session_state.meal_items = []
-                st.session_state.meal_builder_items = []
                 st.session_state.recently_imported_foods = None
+                st.session_state.import_resume = {}
                 st.rerun()
+
+            if DEBUG_PANEL:
+                self.show_debug_panel()
         
         # Main content based on selection
         if selected_page == "📊 Dashboard":
@@ -199,7 +228,50 @@ class MuscleTrackerApp:
             self.show_sleep_log()
         elif selected_page == "📤 Export Data":
             self.show_export_data()
+
+        # Rendered last so it covers every backend call the page made
+        if st.session_state.user.username in ADMIN_USERS:
+            with st.sidebar:
+                self.show_profiling_panel()
     
+    def show_debug_panel(self):
+        """Cache statistics for this server process"""
+        with st.expander("🛠️ Debug"):
+            read_stats = self.backend.read_cache_stats()
+            st.metric("Read cache hit ratio", f"{read_stats['hit_ratio']:.1%}")
+            st.caption(
+                f"{read_stats['hits']} hits / {read_stats['misses']} misses, "
+                f"{read_stats['entries']} of {read_stats['max_entries']} entries"
+            )
+            food_stats = self.backend.food_cache_stats()
+            st.metric("Food cache hit ratio", f"{food_stats['hit_ratio']:.1%}")
+            st.caption(
+                f"{food_stats['hits']} hits / {food_stats['misses']} misses, "
+                f"{food_stats['cached_users']} of {food_stats['max_users']} users"
+            )
+
+    def show_profiling_panel(self):
+        """Slowest backend calls and N+1 offenders of the current rerun (admins only)"""
+        with st.expander("⏱️ Profiling"):
+            calls = self.rerun_calls
+            st.caption(
+                f"{len(calls)} backend call(s), {sum(c.statements for c in calls)} SQL statement(s), "
+                f"{sum(c.seconds for c in calls) * 1000:.1f} ms this rerun"
+            )
+            if calls:
+                st.write("**Slowest calls**")
+                st.dataframe(pd.DataFrame([
+                    {'method': c.method, 'ms': round(c.seconds * 1000, 2), 'statements': c.statements, 'rows': c.rows}
+                    for c in sorted(calls, key=lambda c: c.seconds, reverse=True)[:10]
+                ]), hide_index=True, use_container_width=True)
+            offenders = [(c.method, statement, count) for c in calls for statement, count in c.repeated_statements()]
+            if offenders:
+                st.write("**N+1 offenders**")
+                for method, statement, count in offenders:
+                    st.warning(f"`{method}` ran this statement {count}x:\n\n`{statement[:200]}`")
+            else:
+                st.caption("No statement repeated within a single call.")
+
     def show_dashboard(self):
         """Show dashboard with daily summary"""
         st.markdown('<h2 class="sub-header">📊 Daily Summary</h2>', unsafe_allow_html=True)
@@ -223,7 +295,20 @@ class MuscleTrackerApp:
             st.metric("Carbs", f"{nutrition['carbs']}g")
         with col4:
             st.metric("Fat", f"{nutrition['fat']}g")
-        
+
+        # 7-day calorie trend ending on the selected date
+        end_date = date.fromisoformat(st.session_state.selected_date)
+        trend = self.backend.get_nutrition_range(
+            st.session_state.user.id,
+            (end_date - timedelta(days=6)).isoformat(),
+            end_date.isoformat()
+        )
+        if trend:
+            st.markdown('<h3 class="sub-header">Last 7 Days</h3>', unsafe_allow_html=True)
+            df_trend = pd.DataFrame(trend)
+            df_trend['date'] = pd.to_datetime(df_trend['date'])
+            st.bar_chart(df_trend.set_index('date')['calories'])
+
         # Recent meals
         st.markdown('<h3 class="sub-header">Recent Meals</h3>', unsafe_allow_html=True)
         recent_meals = self.backend.get_meal_logs(
@@ -232,11 +317,9 @@ class MuscleTrackerApp:
         )
         
         if recent_meals:
-            for meal in recent_meals:
+            meal_totals = self.backend.get_nutrition_engine(st.session_state.user.id).meal_totals(recent_meals)
+            for meal, totals in zip(recent_meals, meal_totals):
                 with st.expander(f"{meal.meal_type} - {len(meal.items)} items"):
-                    total_protein = sum(item.food.protein * item.quantity for item in meal.items if item.food)
-                    total_carbs = sum(item.food.carbs * item.quantity for item in meal.items if item.food)
-                    total_fat = sum(item.food.fat * item.quantity for item in meal.items if item.food)
                     
                     col1, col2 = st.columns([2, 1])
                     with col1:
@@ -246,9 +329,9 @@ class MuscleTrackerApp:
                                 st.write(f"- {item.quantity}x {item.food.name} ({item.food.unit})")
                     with col2:
                         st.write("**Nutrition:**")
-                        st.write(f"Protein: {total_protein:.1f}g")
-                        st.write(f"Carbs: {total_carbs:.1f}g")
-                        st.write(f"Fat: {total_fat:.1f}g")
+                        st.write(f"Protein: {totals['protein']:.1f}g")
+                        st.write(f"Carbs: {totals['carbs']:.1f}g")
+                        st.write(f"Fat: {totals['fat']:.1f}g")
         else:
             st.info("No meals logged for today. Go to 'Log Meal' to add your first meal!")
     
@@ -256,6 +339,8 @@ class MuscleTrackerApp:
         """A professional, interactive meal logging interface using a 'shopping cart' model."""
         st.markdown('<h2 class="sub-header">🍽️ Log Meal</h2>', unsafe_allow_html=True)
 
+        cart = self.cart_store.load(self.cart_key())
+
         # Check if we need to reset the quantity from the previous run
         if st.session_state.get('reset_quantity', False):
             st.session_state.meal_item_quantity = 1.0
@@ -288,10 +373,14 @@ class MuscleTrackerApp:
 
         # If foods were recently imported, filter the list to show only those.
         # Otherwise, show all user foods.
-        if st.session_state.recently_imported_foods:
-            user_foods = self.backend.get_user_foods(st.session_state.user.id)
-            filtered_foods = [f for f in user_foods if f.name in st.session_state.recently_imported_foods] # This now compares names
-            st.info(f"Showing the {len(filtered_foods)} food(s) from your recent import. Your old food list was replaced.")
+        recent_import = st.session_state.recently_imported_foods
+        if recent_import and recent_import[0] != self.backend.get_food_version(st.session_state.user.id):
+            # Foods were added, updated or reset since (in any tab), so the list is no longer just the import
+            st.session_state.recently_imported_foods = recent_import = None
+        if recent_import:
+            # The import replaced the whole food list, so every food is from it
+            filtered_foods = self.backend.get_user_foods(st.session_state.user.id)
+            st.info(f"Showing the {recent_import[1]} food(s) from your recent import. Your old food list was replaced.")
             food_options = {f"({f.category}) {f.name} - {f.unit}": f for f in sorted(filtered_foods, key=lambda x: x.name)}
             # Show a simple form for imported foods
             with st.form("add_food_to_meal_form"):
@@ -304,106 +393,111 @@ class MuscleTrackerApp:
                     add_food_btn = st.form_submit_button("➕ Add", use_container_width=True)
                 if add_food_btn and selected_food_key:
                     selected_food = food_options[selected_food_key]
-                    st.session_state.meal_builder_items.append({'food': selected_food, 'quantity': st.session_state.meal_item_quantity})
+                    cart.add(selected_food.id, st.session_state.meal_item_quantity)
+                    self.cart_store.save(self.cart_key(), cart)
                     st.session_state.reset_quantity = True
                     st.rerun()
         else:
             # --- New Visual Food Browser ---
-            user_foods = self.backend.get_user_foods(st.session_state.user.id)
-            foods_by_category = {}
-            for food in user_foods:
-                if food.category not in foods_by_category:
-                    foods_by_category[food.category] = []
-                foods_by_category[food.category].append(food)
-
             # Search bar
             search_term = st.text_input("🔍 Search all foods...", placeholder="e.g., chicken, rice, egg")
 
             if search_term:
                 # Display search results
-                search_results = [f for f in user_foods if search_term.lower() in f.name.lower()]
+                search_results = self.backend.search_foods(st.session_state.user.id, search_term)
                 if not search_results:
                     st.info("No foods found matching your search.")
                 else:
-                    st.write(f"Found {len(search_results)} matching food(s):")
+                    st.write(f"Found {len(search_results)} matching food(s), best matches first:")
                     for food in search_results:
                         c1, c2, c3 = st.columns([4, 2, 1])
                         c1.write(f"**{food.name}** ({food.unit})")
                         quantity = c2.number_input("Qty", min_value=0.1, value=1.0, step=0.25, key=f"qty_search_{food.id}", label_visibility="collapsed")
                         if c3.button("➕", key=f"add_search_{food.id}", use_container_width=True):
-                            st.session_state.meal_builder_items.append({'food': food, 'quantity': quantity})
+                            cart.add(food.id, quantity)
+                            self.cart_store.save(self.cart_key(), cart)
                             st.rerun()
             else:
-                # Display categorized foods
-                for category, foods in sorted(foods_by_category.items()):
-                    with st.expander(f"**{category}** ({len(foods)} items)"):
-                        for food in sorted(foods, key=lambda x: x.name):
-                            c1, c2, c3 = st.columns([4, 2, 1])
-                            c1.write(f"**{food.name}** ({food.unit})")
-                            quantity = c2.number_input("Qty", min_value=0.1, value=1.0, step=0.25, key=f"qty_cat_{food.id}", label_visibility="collapsed")
-                            if c3.button("➕", key=f"add_cat_{food.id}", use_container_width=True):
-                                st.session_state.meal_builder_items.append({'food': food, 'quantity': quantity})
-                                st.rerun()
+                # Display categorized foods: widgets only for one page of the selected category,
+                # so the rerun cost doesn't grow with the catalog
+                foods_by_category = self.backend.get_foods_by_category(st.session_state.user.id)
+                if foods_by_category:
+                    category = st.selectbox(
+                        "Browse by category",
+                        options=list(foods_by_category),
+                        format_func=lambda c: f"{c} ({len(foods_by_category[c])} items)",
+                        key="food_browser_category"
+                    )
+                    foods = foods_by_category[category]
+                    page_size = 25
+                    total_pages = max(1, (len(foods) + page_size - 1) // page_size)
+                    page = 1
+                    if total_pages > 1:
+                        page = st.number_input(f"Page (of {total_pages})", min_value=1, max_value=total_pages, value=1, step=1, key=f"food_browser_page_{category}")
+                    for food in foods[(page - 1) * page_size:page * page_size]:
+                        c1, c2, c3 = st.columns([4, 2, 1])
+                        c1.write(f"**{food.name}** ({food.unit})")
+                        quantity = c2.number_input("Qty", min_value=0.1, value=1.0, step=0.25, key=f"qty_cat_{food.id}", label_visibility="collapsed")
+                        if c3.button("➕", key=f"add_cat_{food.id}", use_container_width=True):
+                            cart.add(food.id, quantity)
+                            self.cart_store.save(self.cart_key(), cart)
+                            st.rerun()
+                else:
+                    st.info("Your food list is empty. Add foods on the 'Add Food' page or import a CSV.")
 
         st.divider()
 
         # --- Step 3: Review and Log Meal ---
         st.markdown("#### Step 3: Review and Log")
-        if not st.session_state.meal_builder_items:
+        if not len(cart):
             st.info("Your meal is empty. Add some foods above to get started.")
         else:
             # Display items in a structured way
-            total_protein, total_carbs, total_fat, total_calories = 0, 0, 0, 0
-            
-            for i, item in enumerate(st.session_state.meal_builder_items):
-                food = item['food']
-                qty = item['quantity']
-                
-                # Calculate totals
-                total_protein += food.protein * qty
-                total_carbs += food.carbs * qty
-                total_fat += food.fat * qty
-                total_calories += food.calories * qty
+            foods_by_id = self.backend.get_foods_by_id(st.session_state.user.id)
+            for i, (food_id, qty) in enumerate(cart):
+                food = foods_by_id.get(food_id)
                 
                 # Display item with a remove button
                 c1, c2, c3 = st.columns([4, 2, 1])
                 with c1:
-                    st.write(f"**{food.name}**")
+                    st.write(f"**{food.name}**" if food else "*Food no longer in your list*")
                 with c2:
-                    st.write(f"{qty} x *({food.unit})*")
+                    st.write(f"{qty} x *({food.unit})*" if food else f"{qty} x")
                 with c3:
                     # Use a unique key for each remove button
                     if st.button(f"➖ Remove", key=f"remove_{i}", use_container_width=True):
-                        st.session_state.meal_builder_items.pop(i)
+                        cart.remove(i)
+                        self.cart_store.save(self.cart_key(), cart)
                         st.rerun()
             
             # Display meal totals
+            totals = self.backend.get_nutrition_engine(st.session_state.user.id).totals(cart.food_ids, cart.quantities)
             st.markdown("---")
             st.markdown("**Meal Totals:**")
             m1, m2, m3, m4 = st.columns(4)
-            m1.metric("Calories", f"{total_calories:.1f} kcal")
-            m2.metric("Protein", f"{total_protein:.1f} g")
-            m3.metric("Carbs", f"{total_carbs:.1f} g")
-            m4.metric("Fat", f"{total_fat:.1f} g")
+            m1.metric("Calories", f"{totals['calories']:.1f} kcal")
+            m2.metric("Protein", f"{totals['protein']:.1f} g")
+            m3.metric("Carbs", f"{totals['carbs']:.1f} g")
+            m4.metric("Fat", f"{totals['fat']:.1f} g")
 
             # Final action buttons
             st.markdown("---")
             log_c1, log_c2 = st.columns(2)
             with log_c1:
                 if st.button("✅ Log This Meal", use_container_width=True, type="primary"):
-                    food_items_to_log = [(item['food'].id, item['quantity']) for item in st.session_state.meal_builder_items]
+                    food_items_to_log = list(cart)
                     success, message = self.backend.log_meal(
                         st.session_state.user.id, meal_type, meal_date.isoformat(), food_items_to_log
                     )
                     if success:
                         st.success("🎉 Meal logged successfully!")
-                        st.session_state.meal_builder_items = [] # Clear the builder
+                        self.cart_store.delete(self.cart_key()) # Clear the builder
                         # st.balloons()
                     else:
                         st.error(f"Error: {message}")
             with log_c2:
                 if st.button("🗑️ Clear Meal", use_container_width=True):
-                    st.session_state.meal_builder_items = []
+                    self.cart_store.delete(self.cart_key())
                     st.rerun()
     
     def show_import_foods(self):
@@ -446,23 +540,24 @@ class MuscleTrackerApp:
             )
         
         if uploaded_file is not None:
-            # Preview data
+            # Preview data (only the first rows are parsed)
             try:
-                df = pd.read_csv(uploaded_file)
+                df = pd.read_csv(uploaded_file, nrows=5)
                 st.write("**Preview of your data:**")
-                st.dataframe(df.head())
+                st.dataframe(df)
                 
+                self.show_import_resume_notice("import", uploaded_file)
                 if st.button("Import Foods", use_container_width=True, key="import_foods_btn"):
-                    # Reset buffer to the beginning before reading again in the backend
-                    uploaded_file.seek(0)
-                    success, result = self.backend.import_foods_from_csv(
-                        st.session_state.user.id,
-                        uploaded_file
+                    success, result = self.run_chunked_import(
+                        self.backend.import_foods_from_csv, "import", uploaded_file
                     )
                     if success:
                         message, imported_food_names = result # result is now a tuple (message, list of names)
                         st.success(message)
-                        st.session_state.recently_imported_foods = imported_food_names
+                        # (food list version, count): the Log Meal filter only applies while the list is unchanged
+                        st.session_state.recently_imported_foods = (
+                            self.backend.get_food_version(st.session_state.user.id), len(imported_food_names)
+                        )
                         st.info("Go to the 'Log Meal' page to use your new food list!")
                         # The rerun is what was causing issues, so we are reverting this. A manual page refresh or re-navigation might be needed.
                     else:
@@ -471,6 +566,43 @@ class MuscleTrackerApp:
             except Exception as e:
                 st.error(f"Error reading CSV file: {str(e)}")
     
+    def show_import_resume_notice(self, kind, uploaded_file):
+        """Tell the user when the next import of this file will pick up after a failed chunk"""
+        resume = st.session_state.import_resume.get(kind)
+        if resume and resume[0] == uploaded_file.name:
+            st.warning(f"A previous run stopped after row {resume[1]}. Processing this file again resumes from row {resume[1] + 1}.")
+            if st.button("Start over from the first row", key=f"restart_{kind}_btn"):
+                st.session_state.import_resume.pop(kind, None)
+                st.rerun()
+
+    def run_chunked_import(self, import_function, kind, uploaded_file):
+        """Run a chunked CSV import with a progress bar, remembering where to resume if a chunk fails"""
+        resume = st.session_state.import_resume.get(kind)
+        start_row = resume[1] if resume and resume[0] == uploaded_file.name else 0
+        progress_bar = st.progress(0.0, text="Reading file...")
+        rows_done = [start_row]
+
+        def on_progress(done, total):
+            rows_done[0] = done
+            if total:
+                progress_bar.progress(min(done / total, 1.0), text=f"Processed {done:,} of {total:,} rows")
+            else:
+                progress_bar.progress(0.0, text=f"Processed {done:,} rows")
+
+        # Reset buffer to the beginning before reading again in the backend
+        uploaded_file.seek(0)
+        success, result = import_function(
+            st.session_state.user.id,
+            uploaded_file,
+            progress_callback=on_progress,
+            start_row=start_row
+        )
+        if success:
+            st.session_state.import_resume.pop(kind, None)
+        elif rows_done[0]:
+            st.session_state.import_resume[kind] = (uploaded_file.name, rows_done[0])
+        return success, result
+
     def show_add_food(self):
         """Show manual food addition interface"""
         st.markdown('<h2 class="sub-header">➕ Add or Update Foods</h2>', unsafe_allow_html=True)
@@ -533,12 +665,10 @@ class MuscleTrackerApp:
         )
 
         if uploaded_file is not None:
+            self.show_import_resume_notice("upsert", uploaded_file)
             if st.button("Process CSV File", use_container_width=True, key="process_csv_btn"):
-                # Reset buffer to the beginning before reading again in the backend
-                uploaded_file.seek(0)
-                success, result = self.backend.upsert_foods_from_csv(
-                    st.session_state.user.id,
-                    uploaded_file
+                success, result = self.run_chunked_import(
+                    self.backend.upsert_foods_from_csv, "upsert", uploaded_file
                 )
                 if success:
                     message, processed_food_names = result
@@ -560,20 +690,31 @@ class MuscleTrackerApp:
         with col2:
             end_date = st.date_input("End Date", value=date.today(), key="end_date_logs")
         
-        # Get logs for date range
-        all_logs = self.backend.get_meal_logs(st.session_state.user.id)
-        filtered_logs = [
-            log for log in all_logs 
-            if start_date <= date.fromisoformat(log.date) <= end_date
-        ]
+        # Only load the visible page of logs for the date range
+        page_size = 20
+        total_logs = self.backend.count_meal_logs(
+            st.session_state.user.id,
+            start_date=start_date.isoformat(),
+            end_date=end_date.isoformat()
+        )
+        total_pages = max(1, (total_logs + page_size - 1) // page_size)
+        page = 1
+        if total_pages > 1:
+            page = st.number_input(f"Page (of {total_pages})", min_value=1, max_value=total_pages, value=1, step=1, key="meal_logs_page")
+        filtered_logs = self.backend.get_meal_logs(
+            st.session_state.user.id,
+            start_date=start_date.isoformat(),
+            end_date=end_date.isoformat(),
+            limit=page_size,
+            offset=(page - 1) * page_size
+        )
         
         if filtered_logs:
+            st.caption(f"Showing {len(filtered_logs)} of {total_logs} meal(s)")
             # Display logs
-            for meal in filtered_logs:
+            meal_totals = self.backend.get_nutrition_engine(st.session_state.user.id).meal_totals(filtered_logs)
+            for meal, totals in zip(filtered_logs, meal_totals):
                 with st.expander(f"{meal.date} - {meal.meal_type}"):
-                    total_protein = sum(item.food.protein * item.quantity for item in meal.items if item.food)
-                    total_carbs = sum(item.food.carbs * item.quantity for item in meal.items if item.food)
-                    total_fat = sum(item.food.fat * item.quantity for item in meal.items if item.food)
                     
                     col1, col2 = st.columns([2, 1])
                     
@@ -585,9 +726,9 @@ class MuscleTrackerApp:
                     
                     with col2:
                         st.write("**Nutrition:**")
-                        st.write(f"Protein: {total_protein:.1f}g")
-                        st.write(f"Carbs: {total_carbs:.1f}g")
-                        st.write(f"Fat: {total_fat:.1f}g")
+                        st.write(f"Protein: {totals['protein']:.1f}g")
+                        st.write(f"Carbs: {totals['carbs']:.1f}g")
+                        st.write(f"Fat: {totals['fat']:.1f}g")
         else:
             st.info("No meal logs found for the selected date range.")
     
@@ -597,8 +738,7 @@ class MuscleTrackerApp:
 
         # --- 1. Visual Summary: Chart and Metrics ---
         st.markdown("#### Last 7 Days at a Glance")
-        sleep_logs = self.backend.get_sleep_logs(st.session_state.user.id)
-        recent_logs = sleep_logs[:7]
+        recent_logs = self.backend.get_recent_sleep(st.session_state.user.id, 7, end_date=date.today().isoformat())
 
         if recent_logs:
             df_sleep = pd.DataFrame([{'date': log.date, 'hours': log.hours} for log in recent_logs])
@@ -637,14 +777,27 @@ class MuscleTrackerApp:
 
         # --- 3. Detailed History ---
         st.markdown("#### 📜 Sleep History")
-        if sleep_logs:
-            for log in sleep_logs:
-                with st.container():
-                    c1, c2, c3 = st.columns([2, 2, 4])
-                    c1.write(f"**{log.date}**")
-                    c2.write(f"{log.hours} hours ({log.quality})")
-                    c3.write(f"*{log.notes or 'No notes'}*")
-                    st.markdown("---", help="line") # A subtle separator
+        page_size = 30
+        total_logs = self.backend.count_sleep_logs(st.session_state.user.id)
+        if total_logs:
+            total_pages = max(1, (total_logs + page_size - 1) // page_size)
+            page = 1
+            if total_pages > 1:
+                page = st.number_input(f"Page (of {total_pages})", min_value=1, max_value=total_pages, value=1, step=1, key="sleep_logs_page")
+            sleep_logs = self.backend.get_sleep_logs(
+                st.session_state.user.id,
+                limit=page_size,
+                offset=(page - 1) * page_size
+            )
+            st.caption(f"Showing {len(sleep_logs)} of {total_logs} night(s)")
+            st.dataframe(
+                pd.DataFrame(
+                    [{'Date': log.date, 'Hours': log.hours, 'Quality': log.quality, 'Notes': log.notes or ''} for log in sleep_logs],
+                    columns=['Date', 'Hours', 'Quality', 'Notes']
+                ),
+                hide_index=True,
+                use_container_width=True
+            )
         else:
             st.info("Your sleep history will appear here once you start logging.")
     
@@ -661,25 +814,33 @@ class MuscleTrackerApp:
             - All your custom food items
             """)
 
-            # Prepare health data for download
-            df_food_log, df_daily_metrics = self.backend.export_combined_logs(st.session_state.user.id)
-            if not df_food_log.empty or not df_daily_metrics.empty:
-                output = BytesIO()
-                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                    df_food_log.to_excel(writer, index=False, sheet_name='Food Log')
-                    df_daily_metrics.to_excel(writer, index=False, sheet_name='Daily Metrics')
-                excel_data = output.getvalue()
+            # Health data is only generated when asked for, and streamed to a temporary file
+            export_formats = {
+                "Excel (.xlsx)": ("xlsx", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+                "CSV (.zip)": ("csv", "zip", "application/zip"),
+                "Parquet (.zip)": ("parquet", "zip", "application/zip"),
+            }
+            export_choice = st.selectbox("Health data format", list(export_formats.keys()), key="health_export_format")
+            file_format, extension, mime = export_formats[export_choice]
 
-                st.download_button(
-                    label="Download Health Data (Excel)",
-                    data=excel_data,
-                    file_name=f"health_data_{date.today()}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    use_container_width=True,
-                    key="download_health_data_btn"
-                )
-            else:
-                st.button("Download Health Data (Excel)", use_container_width=True, disabled=True)
+            if st.button("Prepare Health Data", use_container_width=True, key="prepare_health_data_btn"):
+                with tempfile.TemporaryFile() as export_file:
+                    food_rows, metric_rows = self.backend.write_health_export(
+                        st.session_state.user.id, export_file, file_format
+                    )
+                    if food_rows or metric_rows:
+                        export_file.seek(0)
+                        st.download_button(
+                            label=f"Download Health Data ({export_choice})",
+                            data=export_file,
+                            file_name=f"health_data_{date.today()}.{extension}",
+                            mime=mime,
+                            use_container_width=True,
+                            on_click="ignore",
+                            key="download_health_data_btn"
+                        )
+                    else:
+                        st.info("There is no meal or sleep data to export yet.")
         
         with col2:
             # Prepare food database for download
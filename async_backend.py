@@ -0,0 +1,158 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import database
+from backend import MuscleTrackerBackend, _food_cache
+from database import DailySummary, Food
+from rows import FoodRow, SleepRow
+
+# Async drivers for the sync database URLs the app is configured with (psycopg 3 does both)
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg': 'postgresql+psycopg',
+}
+
+
+def async_database_url(url):
+    """The asyncio flavour of a database URL, e.g. sqlite:///x.db -> sqlite+aiosqlite:///x.db"""
+    scheme, rest = url.split('://', 1)
+    if scheme not in ASYNC_DRIVERS:
+        scheme = scheme.split('+', 1)[0]
+    if scheme not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database URL: {url}")
+    return f"{ASYNC_DRIVERS[scheme]}://{rest}"
+
+
+class AsyncMuscleTrackerBackend:
+    """asyncio facade over the backend, for pages that need several independent reads.
+
+    The reads a page is assembled from (nutrition, meal logs, sleep logs, foods) run natively
+    on an AsyncEngine, and load_dashboard/load_view_logs/load_export_frames run a page's reads
+    concurrently with asyncio.gather. Every other public MuscleTrackerBackend method is
+    available as a coroutine that runs the sync method in a worker thread, so the whole API
+    can be awaited. The engine's connections belong to the event loop that first uses them:
+    use one instance per loop and `await dispose()` when done.
+    """
+
+    def __init__(self, database_url=None):
+        # The sync backend creates the schema and runs migrations, and serves the writes
+        self.backend = MuscleTrackerBackend()
+        url = async_database_url(database_url or database.DATABASE_URL)
+        engine_options = {}
+        if ':memory:' not in url and not url.endswith('://'):
+            engine_options.update(
+                pool_size=database.DB_POOL_SIZE,
+                max_overflow=database.DB_MAX_OVERFLOW,
+                pool_timeout=database.DB_POOL_TIMEOUT,
+                pool_recycle=database.DB_POOL_RECYCLE,
+            )
+        self.engine = create_async_engine(url, **engine_options)
+        if url.startswith('sqlite'):
+            event.listen(self.engine.sync_engine, 'connect', database._set_sqlite_pragmas)
+        self._sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    async def dispose(self):
+        await self.engine.dispose()
+
+    def __getattr__(self, name):
+        attribute = getattr(self.backend, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+
+        async def in_thread(*args, **kwargs):
+            return await asyncio.to_thread(attribute, *args, **kwargs)
+        in_thread.__name__ = name
+        return in_thread
+
+    # Native async reads
+    async def get_user_foods(self, user_id):
+        """Get all food items for a user as FoodRows (shares the sync backend's food catalog cache)"""
+        async with self._sessionmaker() as session:
+            versions = (await session.execute(self.backend._user_versions_query(user_id))).first()
+            version = versions.food_version if versions else 0
+            foods = _food_cache.get(user_id, version)
+            if foods is None:
+                result = await session.execute(self.backend._food_rows_query().where(Food.user_id == user_id))
+                foods = [FoodRow._make(row) for row in result]
+                _food_cache.put(user_id, version, foods)
+        return list(foods)
+
+    async def get_daily_nutrition(self, user_id, target_date):
+        """Get total nutrition for a specific date"""
+        async with self._sessionmaker() as session:
+            summary = (await session.execute(select(DailySummary).where(
+                and_(
+                    DailySummary.user_id == user_id,
+                    DailySummary.date == target_date
+                )
+            ))).scalars().first()
+        if summary is None:
+            return {'protein': 0, 'carbs': 0, 'fat': 0, 'calories': 0}
+        return self.backend._summary_to_dict(summary)
+
+    async def get_nutrition_range(self, user_id, start_date, end_date):
+        """Get total nutrition per day between two dates (inclusive), oldest first"""
+        async with self._sessionmaker() as session:
+            summaries = (await session.execute(select(DailySummary).where(
+                and_(
+                    DailySummary.user_id == user_id,
+                    DailySummary.date >= start_date,
+                    DailySummary.date <= end_date
+                )
+            ).order_by(DailySummary.date))).scalars().all()
+        return [{'date': summary.date, **self.backend._summary_to_dict(summary)} for summary in summaries]
+
+    async def get_meal_logs(self, user_id, target_date=None, start_date=None, end_date=None, limit=None, offset=0):
+        """Get meal logs for a user as MealRows, newest first (same filters as the sync backend)"""
+        async with self._sessionmaker() as session:
+            meals = (await session.execute(
+                self.backend._meal_logs_page_query(user_id, target_date, start_date, end_date, limit, offset)
+            )).all()
+            if not meals:
+                return []
+            item_rows = (await session.execute(self.backend._meal_items_query([meal.id for meal in meals]))).all()
+        return self.backend._build_meal_rows(meals, item_rows)
+
+    async def count_meal_logs(self, user_id, target_date=None, start_date=None, end_date=None):
+        """Count meal logs matching the same filters as get_meal_logs"""
+        async with self._sessionmaker() as session:
+            return (await session.execute(
+                self.backend._count_meal_logs_query(user_id, target_date, start_date, end_date)
+            )).scalar_one()
+
+    async def get_sleep_logs(self, user_id, start_date=None, end_date=None, limit=None, offset=0):
+        """Get sleep logs for a user as SleepRows, newest first (same filters as the sync backend)"""
+        async with self._sessionmaker() as session:
+            result = await session.execute(self.backend._sleep_rows_query(user_id, start_date, end_date, limit, offset))
+            return [SleepRow._make(row) for row in result]
+
+    # Pages assembled from concurrent reads
+    async def load_dashboard(self, user_id, target_date, trend_days=7):
+        """Everything the dashboard shows for one date: its totals, the calorie trend and its meals"""
+        end = datetime.strptime(target_date, '%Y-%m-%d').date()
+        start = (end - timedelta(days=trend_days - 1)).isoformat()
+        nutrition, trend, meals = await asyncio.gather(
+            self.get_daily_nutrition(user_id, target_date),
+            self.get_nutrition_range(user_id, start, target_date),
+            self.get_meal_logs(user_id, target_date),
+        )
+        return {'nutrition': nutrition, 'trend': trend, 'meals': meals}
+
+    async def load_view_logs(self, user_id, start_date, end_date, limit=20, offset=0):
+        """(total matching meals, one page of them) for the View Logs page"""
+        return tuple(await asyncio.gather(
+            self.count_meal_logs(user_id, start_date=start_date, end_date=end_date),
+            self.get_meal_logs(user_id, start_date=start_date, end_date=end_date, limit=limit, offset=offset),
+        ))
+
+    async def load_export_frames(self, user_id):
+        """(meal log frame, sleep log frame, foods) for the export page"""
+        return tuple(await asyncio.gather(
+            self.export_meal_logs(user_id),
+            self.export_sleep_logs(user_id),
+            self.get_user_foods(user_id),
+        ))
@@ -1,14 +1,203 @@
 import pandas as pd
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, insert, update, select, union
 from datetime import datetime, date, timedelta
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload
 import os
 import secrets
 import hashlib
-from database import get_session, User, Food, Meal, MealItem, SleepLog, AuthToken
+import threading
+import time
+import csv
+import io
+import tempfile
+import zipfile
+from itertools import islice
+from cachetools import LRUCache, TTLCache
+from food_search import FoodSearchIndex
+from nutrition import NutritionEngine
+from instrumentation import instrumented, instrument_engine, start_metrics_server
+from rows import FoodRow, MealItemRow, MealRow, SleepRow
+from database import init_db, get_session, refresh_daily_summaries, bump_data_version, food_name_key, User, Food, Meal, MealItem, SleepLog, AuthToken, DailySummary
+
+# Rows read, validated and committed per transaction by the CSV food imports
+FOOD_IMPORT_CHUNK_SIZE = 5000
+
+# Rows fetched from the database and written per batch by the streaming health export
+HEALTH_EXPORT_BATCH_SIZE = 1000
+
+FOOD_LOG_COLUMNS = ['date', 'meal_type', 'food_name', 'quantity', 'protein', 'carbs', 'fat', 'calories', 'logged_at']
+DAILY_METRICS_COLUMNS = ['date', 'total_protein', 'total_carbs', 'total_fat', 'total_calories', 'hours', 'sleep_quality', 'notes']
+
+# How many users' food catalogs are kept in memory at once
+FOOD_CACHE_MAX_USERS = int(os.environ.get('MUSCLE_TRACKER_FOOD_CACHE_MAX_USERS', '256'))
+
+class FoodCatalogCache:
+    """Process-wide LRU cache of each user's food list and the structures built from it
+    (search index, nutrition engine), keyed on the user's food_version.
+
+    Every write to a user's foods bumps users.food_version in the same transaction, whichever
+    server process makes it, so an entry built from an older version is never served. Readers
+    take the version before reading the foods, so a slow read racing a write can only store its
+    list under the old version. invalidate() just frees a changed user's entry early."""
+
+    def __init__(self, max_users):
+        self._entries = LRUCache(maxsize=max_users)
+        self._lock = threading.Lock()
+        # (user_id, version, name) -> {'lock', 'value'} of derived structures being built
+        self._builds = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _current_entry(self, user_id, version):
+        entry = self._entries.get(user_id)
+        if entry is not None and entry['version'] == version:
+            return entry
+        return None
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._current_entry(user_id, version)
+            if entry is not None:
+                self.hits += 1
+                return entry['foods']
+            self.misses += 1
+            return None
+
+    def put(self, user_id, version, foods):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry['version'] < version:
+                self._entries[user_id] = {'version': version, 'foods': foods, 'derived': {}}
+
+    def get_derived(self, user_id, version, name):
+        with self._lock:
+            entry = self._current_entry(user_id, version)
+            return entry['derived'].get(name) if entry is not None else None
+
+    def put_derived(self, user_id, version, name, value):
+        """Attach a structure built from the cached food list (e.g. 'search_index') to it"""
+        with self._lock:
+            entry = self._current_entry(user_id, version)
+            if entry is not None:
+                entry['derived'][name] = value
+
+    def get_or_build_derived(self, user_id, version, name, build):
+        """The derived structure `name` for this food_version, calling build() to make it if needed.
+        Only one thread builds a given (user_id, version, name); threads asking for it at the
+        same time wait for that build and share its result instead of building their own."""
+        value = self.get_derived(user_id, version, name)
+        if value is not None:
+            return value
+        key = (user_id, version, name)
+        with self._lock:
+            in_flight = self._builds.get(key)
+            if in_flight is None:
+                in_flight = self._builds[key] = {'lock': threading.Lock(), 'value': None}
+        with in_flight['lock']:
+            # A build we waited for may have finished, or one may have finished before we started
+            value = in_flight['value'] or self.get_derived(user_id, version, name)
+            if value is None:
+                try:
+                    value = in_flight['value'] = build()
+                    self.put_derived(user_id, version, name, value)
+                finally:
+                    with self._lock:
+                        if self._builds.get(key) is in_flight:
+                            del self._builds[key]
+        return value
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+                'cached_users': len(self._entries),
+                'max_users': self._entries.maxsize,
+            }
+
+_food_cache = FoodCatalogCache(FOOD_CACHE_MAX_USERS)
+
+# How many memoized read results CachedMuscleTrackerBackend keeps, across all users
+READ_CACHE_MAX_ENTRIES = int(os.environ.get('MUSCLE_TRACKER_READ_CACHE_MAX_ENTRIES', '1024'))
+
+class BackendReadCache:
+    """Process-wide LRU cache of backend read results, keyed on (method, user_id, data version, args).
+
+    Every write for a user bumps users.data_version in the database, whichever server process
+    makes it, so older entries are never looked up again and simply age out of the LRU."""
+
+    def __init__(self, max_entries):
+        self._entries = LRUCache(maxsize=max_entries)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return (True, value) for a cached key, (False, None) otherwise"""
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self._entries.maxsize,
+            }
+
+_read_cache = BackendReadCache(READ_CACHE_MAX_ENTRIES)
+
+# Validated "remember me" token hashes -> (user, expires_at), so reruns skip the database.
+# Kept short so a token deleted by another process stops working soon after.
+REMEMBER_ME_CACHE_TTL_SECONDS = int(os.environ.get('MUSCLE_TRACKER_REMEMBER_ME_CACHE_TTL', '60'))
+_remember_me_cache = TTLCache(maxsize=4096, ttl=REMEMBER_ME_CACHE_TTL_SECONDS)
+_remember_me_cache_lock = threading.Lock()
+
+# Expired auth tokens are deleted on startup and then at most this often
+TOKEN_SWEEP_INTERVAL_SECONDS = int(os.environ.get('MUSCLE_TRACKER_TOKEN_SWEEP_INTERVAL', '3600'))
+_last_token_sweep = None
+_token_sweep_lock = threading.Lock()
+
+def _group_foods_by_category(foods):
+    groups = {}
+    for food in foods:
+        groups.setdefault(food.category or 'Uncategorized', []).append(food)
+    return {category: sorted(groups[category], key=lambda food: food.name) for category in sorted(groups)}
+
+@instrumented
 class MuscleTrackerBackend:
     def __init__(self):
-        pass  # Session will be created per-method
+        # Engine, pool and schema are set up once per process; sessions are still per-method
+        instrument_engine(init_db())
+        start_metrics_server()
+        self._maybe_sweep_expired_tokens()
+
+    def _maybe_sweep_expired_tokens(self):
+        """Run sweep_expired_tokens on the first backend of the process, then once per interval"""
+        global _last_token_sweep
+        now = time.monotonic()
+        with _token_sweep_lock:
+            if _last_token_sweep is not None and now - _last_token_sweep < TOKEN_SWEEP_INTERVAL_SECONDS:
+                return
+            _last_token_sweep = now
+        self.sweep_expired_tokens()
     
     # User Authentication
     def create_user(self, username, password):
@@ -40,6 +229,11 @@ class MuscleTrackerBackend:
         try:
             user = session.query(User).filter(User.username == username).first()
             if user and user.check_password(password):
+                if user.password_needs_rehash():
+                    # The configured bcrypt cost changed since this hash was made
+                    user.set_password(password)
+                    session.commit()
+                    session.refresh(user)
                 return True, user
             return False, "Invalid username or password"
         finally:
@@ -71,12 +265,23 @@ class MuscleTrackerBackend:
         """Validate a token from a cookie and return the user if it's valid."""
         if not token:
             return None
+        token_hash = hashlib.sha256(token.encode()).hexdigest()
+        with _remember_me_cache_lock:
+            cached = _remember_me_cache.get(token_hash)
+        if cached is not None:
+            user, expires_at = cached
+            if expires_at > datetime.utcnow():
+                return user
         session = get_session()
         try:
-            token_hash = hashlib.sha256(token.encode()).hexdigest()
-            auth_token = session.query(AuthToken).filter_by(token_hash=token_hash).first()
+            # Load the user in the same query so it is usable after the session closes
+            auth_token = session.query(AuthToken).options(
+                joinedload(AuthToken.user)
+            ).filter_by(token_hash=token_hash).first()
 
             if auth_token and auth_token.expires_at > datetime.utcnow():
+                with _remember_me_cache_lock:
+                    _remember_me_cache[token_hash] = (auth_token.user, auth_token.expires_at)
                 return auth_token.user
             return None
         finally:
@@ -89,10 +294,27 @@ class MuscleTrackerBackend:
         session = get_session()
         try:
             token_hash = hashlib.sha256(token.encode()).hexdigest()
+            with _remember_me_cache_lock:
+                _remember_me_cache.pop(token_hash, None)
             session.query(AuthToken).filter_by(token_hash=token_hash).delete()
             session.commit()
         finally:
             session.close()
+
+    def sweep_expired_tokens(self):
+        """Delete every expired 'Remember Me' token in one statement. Returns how many were removed."""
+        session = get_session()
+        try:
+            deleted = session.query(AuthToken).filter(
+                AuthToken.expires_at <= datetime.utcnow()
+            ).delete(synchronize_session=False)
+            session.commit()
+            return deleted
+        except Exception:
+            session.rollback()
+            return 0
+        finally:
+            session.close()
     
     def _add_default_foods(self, user_id, session):
         """Add default food items for new users"""
@@ -152,18 +374,20 @@ class MuscleTrackerBackend:
             {"name": "Peanut butter", "category": "Fats & Oils", "unit": "1 tbsp (~15g)", "protein": 4, "carbs": 3, "fat": 8},
         ]
         
-        for food_data in default_foods:
-            food = Food(
-                user_id=user_id,
-                name=food_data["name"],
-                category=food_data["category"],
-                unit=food_data["unit"],
-                protein=food_data["protein"],
-                carbs=food_data["carbs"],
-                fat=food_data["fat"],
-                calories=self._calculate_calories(food_data["protein"], food_data["carbs"], food_data["fat"])
-            )
-            session.add(food)
+        # One executemany instead of an ORM add per food
+        session.execute(insert(Food), [
+            {
+                'user_id': user_id,
+                'name': food_data["name"],
+                'category': food_data["category"],
+                'unit': food_data["unit"],
+                'protein': food_data["protein"],
+                'carbs': food_data["carbs"],
+                'fat': food_data["fat"],
+                'calories': self._calculate_calories(food_data["protein"], food_data["carbs"], food_data["fat"])
+            }
+            for food_data in default_foods
+        ])
         
     def _calculate_calories(self, protein, carbs, fat):
         """Calculate calories using standard formula: 4*protein + 4*carbs + 9*fat"""
@@ -186,7 +410,9 @@ class MuscleTrackerBackend:
                 calories=calories
             )
             session.add(food)
+            bump_data_version(session.connection(), user_id, foods=True)
             session.commit()
+            _food_cache.invalidate(user_id)
             return True, "Food added successfully"
         except Exception as e:
             session.rollback()
@@ -195,145 +421,278 @@ class MuscleTrackerBackend:
             session.close()
     
     def get_user_foods(self, user_id):
-        """Get all food items for a user"""
+        """Get all food items for a user as FoodRows (served from the food catalog cache when possible)"""
+        return list(self._catalog_foods(user_id, self.get_food_version(user_id)))
+
+    def _catalog_foods(self, user_id, version):
+        """The user's food list at (or after) `version`, from the food catalog cache when possible"""
+        foods = _food_cache.get(user_id, version)
+        if foods is None:
+            session = get_session()
+            try:
+                foods = [FoodRow._make(row) for row in session.execute(
+                    self._food_rows_query().where(Food.user_id == user_id)
+                )]
+            finally:
+                session.close()
+            _food_cache.put(user_id, version, foods)
+        return foods
+
+    def _user_versions_query(self, user_id):
+        return select(User.food_version, User.data_version).where(User.id == user_id)
+
+    def get_food_version(self, user_id):
+        """A number that changes whenever the user's food list changes, in any server process"""
         session = get_session()
         try:
-            return session.query(Food).filter(Food.user_id == user_id).all()
+            versions = session.execute(self._user_versions_query(user_id)).first()
+            return versions.food_version if versions else 0
         finally:
             session.close()
-    
-    def search_foods(self, user_id, search_term):
-        """Search foods by name for a user"""
+
+    def get_data_version(self, user_id):
+        """A number that changes whenever any of the user's data changes, in any server process"""
         session = get_session()
         try:
-            return session.query(Food).filter(
-                and_(
-                    Food.user_id == user_id,
-                    Food.name.ilike(f"%{search_term}%")
-                )
-            ).all()
+            versions = session.execute(self._user_versions_query(user_id)).first()
+            return versions.data_version if versions else 0
         finally:
             session.close()
+
+    def _food_rows_query(self):
+        return select(*(getattr(Food, field) for field in FoodRow._fields))
+
+    def food_cache_stats(self):
+        """Hit/miss counters and size of the process-wide food catalog cache"""
+        return _food_cache.stats()
     
-    def import_foods_from_csv(self, user_id, csv_file_object):
-        """Import foods from CSV file"""
-        session = get_session()
+    def _get_catalog_derived(self, user_id, name, build):
+        """build(foods) for the user's food list, cached until their food list changes"""
+        version = self.get_food_version(user_id)
+        return _food_cache.get_or_build_derived(
+            user_id, version, name, lambda: build(list(self._catalog_foods(user_id, version)))
+        )
+
+    def _get_search_index(self, user_id):
+        return self._get_catalog_derived(user_id, 'search_index', FoodSearchIndex)
+
+    def get_foods_by_id(self, user_id):
+        """The user's foods as a {food_id: FoodRow} dict"""
+        return self._get_catalog_derived(user_id, 'foods_by_id', lambda foods: {food.id: food for food in foods})
+
+    def get_foods_by_category(self, user_id):
+        """The user's foods grouped by category (sorted), each group sorted by name"""
+        return self._get_catalog_derived(user_id, 'foods_by_category', _group_foods_by_category)
+
+    def get_nutrition_engine(self, user_id):
+        """The user's foods as a NutritionEngine, for computing meal, day and range totals"""
+        return self._get_catalog_derived(user_id, 'nutrition_engine', NutritionEngine)
+
+    def search_foods(self, user_id, search_term, limit=50):
+        """Search foods by name or category for a user.
+        Matches prefixes, substrings and near-misses (typos), best matches first."""
+        return self._get_search_index(user_id).search(search_term, limit=limit)
+    
+    def _prepare_food_frame(self, df):
+        """Clean and validate an uploaded food table column-wise.
+        Returns the valid rows (with calories computed) and a list of per-row error messages."""
+        df = df.fillna({'protein': 0.0, 'carbs': 0.0, 'fat': 0.0, 'category': 'Other', 'unit': 'unit'})
+        names = df['name'].fillna('').astype(str).str.strip()
+        # Rows without a name are skipped silently, as before
+        valid = names != ''
+        errors = []
+        macros = {}
+        for column in ('protein', 'carbs', 'fat'):
+            values = pd.to_numeric(df[column], errors='coerce')
+            invalid = values.isna() & valid
+            for index in df.index[invalid]:
+                # +2: one for the header line, one because CSV rows are 1-based
+                errors.append(f"Row {index + 2}: '{df.at[index, column]}' is not a valid {column} value")
+            valid &= ~invalid
+            macros[column] = values.astype(float)
+
+        foods = pd.DataFrame({
+            'name': names,
+            'category': df['category'].astype(str),
+            'unit': df['unit'].astype(str),
+            **macros
+        })[valid]
+        foods['calories'] = self._calculate_calories(foods['protein'], foods['carbs'], foods['fat'])
+        return foods, errors
+
+    def _format_row_errors(self, errors, limit=5):
+        if not errors:
+            return ""
+        shown = "; ".join(errors[:limit])
+        more = f" (and {len(errors) - limit} more)" if len(errors) > limit else ""
+        return f" Skipped {len(errors)} invalid row(s): {shown}{more}."
+
+    def _count_csv_rows(self, csv_file_object):
+        """Count data rows for progress reporting without parsing the file; None if it can't be rewound"""
         try:
-            # Use pandas to fill empty values with 0 for numeric columns
-            # and empty strings for others to prevent errors.
-            df = pd.read_csv(csv_file_object).fillna({'protein': 0.0, 'carbs': 0.0, 'fat': 0.0, 'category': 'Other', 'unit': 'unit'})
+            position = csv_file_object.tell()
+            total_lines = sum(1 for _ in csv_file_object)
+            csv_file_object.seek(position)
+        except (AttributeError, OSError):
+            return None
+        return max(total_lines - 1, 0)
 
-            required_columns = ['name', 'category', 'unit', 'protein', 'carbs', 'fat']
-            
-            if not all(col in df.columns for col in required_columns):
-                return False, "CSV missing required columns: name, category, unit, protein, carbs, fat"
-            
-            # --- DESTRUCTIVE ACTION: Delete all meal logs and foods for this user ---
-            # Delete associated MealItems first due to foreign key constraints
-            meal_ids_query = session.query(Meal.id).filter(Meal.user_id == user_id)
-            session.query(MealItem).filter(MealItem.meal_id.in_(meal_ids_query)).delete(synchronize_session=False)
-            # Delete Meals
-            session.query(Meal).filter(Meal.user_id == user_id).delete(synchronize_session=False)
-            # Finally, delete all existing foods for the user
-            session.query(Food).filter(Food.user_id == user_id).delete(synchronize_session=False)
-            
-            imported_count = 0
-            imported_foods = []
-            for _, row in df.iterrows():
-                # Clean the input name: remove leading/trailing whitespace
-                food_name_from_csv = str(row['name']).strip()
-
-                # Since we deleted all previous foods, we can add every row from the CSV as a new food.
-                if food_name_from_csv: # Ensure the name is not empty
-                    # Ensure macros default to 0.0 if they are missing/NaN in the CSV
-                    protein = float(row.get('protein', 0.0) or 0.0)
-                    carbs = float(row.get('carbs', 0.0) or 0.0)
-                    fat = float(row.get('fat', 0.0) or 0.0)
-
-                    calories = self._calculate_calories(protein, carbs, fat)
-
-                    food = Food(
-                        user_id=user_id,
-                        name=food_name_from_csv, # Use the cleaned name
-                        category=row['category'],
-                        unit=row['unit'],
-                        protein=protein,
-                        carbs=carbs,
-                        fat=fat,
-                        calories=calories
-                    )
-                    session.add(food)
-                    imported_count += 1
-                    imported_foods.append(food_name_from_csv)
+    def _read_food_chunks(self, csv_file_object, chunk_size, start_row):
+        """Yield the CSV in DataFrames of at most chunk_size rows, skipping the first start_row data rows.
+        The index of every chunk is the row's position in the whole file."""
+        skiprows = range(1, start_row + 1) if start_row else None
+        for chunk in pd.read_csv(csv_file_object, chunksize=chunk_size, skiprows=skiprows):
+            chunk.index += start_row
+            yield chunk
+
+    def _resume_hint(self, rows_done):
+        if not rows_done:
+            return ""
+        return f" The first {rows_done} row(s) were saved; resume from row {rows_done + 1} to continue."
+
+    def import_foods_from_csv(self, user_id, csv_file_object, chunk_size=FOOD_IMPORT_CHUNK_SIZE,
+                              progress_callback=None, start_row=0):
+        """Import foods from CSV file.
+
+        The file is read, validated and committed chunk_size rows at a time, so memory stays bounded.
+        progress_callback(rows_done, total_rows) is called after every committed chunk. If a chunk
+        fails, the earlier chunks stay saved and the import can be resumed by passing start_row=rows_done
+        (a resumed import does not delete the food list again)."""
+        total_rows = self._count_csv_rows(csv_file_object) if progress_callback else None
+        rows_done = start_row
+        imported_foods = []
+        row_errors = []
+        required_columns = ['name', 'category', 'unit', 'protein', 'carbs', 'fat']
+        session = get_session()
+        try:
+            for chunk in self._read_food_chunks(csv_file_object, chunk_size, start_row):
+                if not all(col in chunk.columns for col in required_columns):
+                    return False, "CSV missing required columns: name, category, unit, protein, carbs, fat"
+                
+                # Clean every column at once; invalid rows are reported instead of aborting the import
+                foods, chunk_errors = self._prepare_food_frame(chunk)
+                
+                if rows_done == 0:
+                    # --- DESTRUCTIVE ACTION: Delete all meal logs and foods for this user ---
+                    # Done in the first chunk's transaction, so a failure here leaves everything intact.
+                    # Delete associated MealItems first due to foreign key constraints
+                    meal_ids_query = session.query(Meal.id).filter(Meal.user_id == user_id)
+                    session.query(MealItem).filter(MealItem.meal_id.in_(meal_ids_query)).delete(synchronize_session=False)
+                    # Delete Meals
+                    session.query(Meal).filter(Meal.user_id == user_id).delete(synchronize_session=False)
+                    # With no meals left, the daily summaries go too
+                    session.query(DailySummary).filter(DailySummary.user_id == user_id).delete(synchronize_session=False)
+                    # Finally, delete all existing foods for the user
+                    session.query(Food).filter(Food.user_id == user_id).delete(synchronize_session=False)
+                
+                # Since we deleted all previous foods, every valid row goes in as a new food in one executemany
+                if not foods.empty:
+                    session.execute(insert(Food), foods.assign(user_id=user_id).to_dict('records'))
+                bump_data_version(session.connection(), user_id, foods=True)
+                session.commit()
+                
+                rows_done += len(chunk)
+                imported_foods.extend(foods['name'].tolist())
+                row_errors.extend(chunk_errors)
+                if progress_callback:
+                    progress_callback(rows_done, total_rows)
             
-            session.commit()
-            message = f"Success! Your food list has been replaced with {imported_count} new food(s) from your file."
+            message = f"Success! Your food list has been replaced with {len(imported_foods)} new food(s) from your file."
+            message += self._format_row_errors(row_errors)
             return True, (message, imported_foods)
         except Exception as e:
             session.rollback()
-            return False, f"Error importing foods: {str(e)}"
+            return False, f"Error importing foods: {str(e)}.{self._resume_hint(rows_done)}"
         finally:
             session.close()
+            # Chunks may have been committed even if the import failed part-way
+            _food_cache.invalidate(user_id)
     
-    def upsert_foods_from_csv(self, user_id, csv_file_object):
+    def upsert_foods_from_csv(self, user_id, csv_file_object, chunk_size=FOOD_IMPORT_CHUNK_SIZE,
+                              progress_callback=None, start_row=0):
         """
         Adds or updates foods from a CSV file.
         If a food with the same name exists, it's updated. Otherwise, it's added.
         This is a non-destructive operation.
+
+        Like import_foods_from_csv, the file is processed and committed in chunks, reports progress
+        through progress_callback(rows_done, total_rows) and can be resumed with start_row.
         """
+        total_rows = self._count_csv_rows(csv_file_object) if progress_callback else None
+        rows_done = start_row
+        added_count = 0
+        updated_count = 0
+        processed_food_names = []
+        row_errors = []
+        required_columns = ['name', 'category', 'unit', 'protein', 'carbs', 'fat']
+        columns = ['category', 'unit', 'protein', 'carbs', 'fat', 'calories']
         session = get_session()
         try:
-            df = pd.read_csv(csv_file_object).fillna({'protein': 0.0, 'carbs': 0.0, 'fat': 0.0, 'category': 'Other', 'unit': 'unit'})
-            required_columns = ['name', 'category', 'unit', 'protein', 'carbs', 'fat']
-            if not all(col in df.columns for col in required_columns):
-                return False, "CSV missing required columns: name, category, unit, protein, carbs, fat"
-
-            added_count = 0
-            updated_count = 0
-            processed_food_names = []
-
-            for _, row in df.iterrows():
-                food_name_from_csv = str(row['name']).strip()
-                if not food_name_from_csv:
-                    continue
-
-                # Find existing food (case-insensitive)
-                existing_food = session.query(Food).filter(
+            # One lookup of the user's existing names (case-insensitive) instead of one per row.
+            # Names are folded in Python, not with SQL lower(), which differs between backends.
+            existing_ids = {}
+            last_seen_id = 0
+            for food_id, name in session.query(Food.id, Food.name).filter(
+                Food.user_id == user_id
+            ).order_by(Food.id):
+                existing_ids.setdefault(food_name_key(name), food_id)
+                last_seen_id = food_id
+
+            for chunk in self._read_food_chunks(csv_file_object, chunk_size, start_row):
+                if not all(col in chunk.columns for col in required_columns):
+                    return False, "CSV missing required columns: name, category, unit, protein, carbs, fat"
+
+                foods, chunk_errors = self._prepare_food_frame(chunk)
+                foods['name_key'] = foods['name'].map(food_name_key)
+
+                # A row counts as "added" the first time its name appears and wasn't already stored;
+                # any later row with the same name updates it, and the last one wins.
+                is_new = ~foods['name_key'].isin(existing_ids) & ~foods['name_key'].duplicated(keep='first')
+                chunk_added = int(is_new.sum())
+
+                latest = foods.drop_duplicates('name_key', keep='last')
+                to_insert = latest[~latest['name_key'].isin(existing_ids)]
+                to_update = latest[latest['name_key'].isin(existing_ids)]
+
+                if not to_insert.empty:
+                    session.execute(insert(Food), to_insert[['name'] + columns].assign(user_id=user_id).to_dict('records'))
+
+                if not to_update.empty:
+                    updated_food_ids = to_update['name_key'].map(existing_ids).tolist()
+                    session.execute(update(Food), to_update[columns].assign(id=updated_food_ids).to_dict('records'))
+                    # Changed macros alter the totals of every day those foods were eaten
+                    self._refresh_summaries_for_foods(session, user_id, updated_food_ids)
+                bump_data_version(session.connection(), user_id, foods=True)
+                session.commit()
+
+                # Foods added by this chunk can be updated by later ones
+                for food_id, name in session.query(Food.id, Food.name).filter(
                     and_(
                         Food.user_id == user_id,
-                        func.lower(Food.name) == food_name_from_csv.lower()
+                        Food.id > last_seen_id
                     )
-                ).first()
-
-                protein = float(row.get('protein', 0.0) or 0.0)
-                carbs = float(row.get('carbs', 0.0) or 0.0)
-                fat = float(row.get('fat', 0.0) or 0.0)
-                calories = self._calculate_calories(protein, carbs, fat)
-
-                if existing_food:
-                    # Update existing food
-                    existing_food.category = row['category']
-                    existing_food.unit = row['unit']
-                    existing_food.protein = protein
-                    existing_food.carbs = carbs
-                    existing_food.fat = fat
-                    existing_food.calories = calories
-                    updated_count += 1
-                else:
-                    # Add new food
-                    new_food = Food(user_id=user_id, name=food_name_from_csv, category=row['category'], unit=row['unit'], protein=protein, carbs=carbs, fat=fat, calories=calories)
-                    session.add(new_food)
-                    added_count += 1
-                processed_food_names.append(food_name_from_csv)
+                ).order_by(Food.id):
+                    existing_ids.setdefault(food_name_key(name), food_id)
+                    last_seen_id = food_id
+
+                rows_done += len(chunk)
+                added_count += chunk_added
+                updated_count += len(foods) - chunk_added
+                processed_food_names.extend(foods['name'].tolist())
+                row_errors.extend(chunk_errors)
+                if progress_callback:
+                    progress_callback(rows_done, total_rows)
             
-            session.commit()
             message = f"Success! Added {added_count} new food(s) and updated {updated_count} existing one(s)."
+            message += self._format_row_errors(row_errors)
             return True, (message, processed_food_names)
         except Exception as e:
             session.rollback()
-            return False, f"Error processing CSV: {str(e)}"
+            return False, f"Error processing CSV: {str(e)}.{self._resume_hint(rows_done)}"
         finally:
             session.close()
+            # Chunks may have been committed even if the upsert failed part-way
+            _food_cache.invalidate(user_id)
 
     # Meal Logging
     def log_meal(self, user_id, meal_type, meal_date, food_items):
@@ -358,6 +717,10 @@ class MuscleTrackerBackend:
                 )
                 session.add(meal_item)
             
+            session.flush()
+            refresh_daily_summaries(session.connection(), user_id, [meal_date])
+            bump_data_version(session.connection(), user_id)
+            
             session.commit()
             return True, "Meal logged successfully"
         except Exception as e:
@@ -365,88 +728,222 @@ class MuscleTrackerBackend:
             return False, f"Error logging meal: {str(e)}"
         finally:
             session.close()
+
+    def log_meals_bulk(self, user_id, meals):
+        """Log many meals in a single transaction, e.g. a week's meal plan or an offline client's backlog.
+
+        `meals` is a list of (meal_type, meal_date, food_items) tuples, with food_items as
+        (food_id, quantity) pairs just like log_meal. Every food id must belong to the user;
+        otherwise nothing is written. Returns (True, [new meal ids in input order])."""
+        # food_items are read twice (validation, then the inserts), so materialize any iterators once
+        meals = [(meal_type, meal_date, list(food_items)) for meal_type, meal_date, food_items in meals]
+        if not meals:
+            return True, []
+        session = get_session()
+        try:
+            # Validate every referenced food against the user up front
+            requested_ids = list({food_id for _, _, food_items in meals for food_id, _ in food_items})
+            known_ids = set()
+            for start in range(0, len(requested_ids), 500):
+                known_ids.update(row.id for row in session.query(Food.id).filter(
+                    and_(
+                        Food.user_id == user_id,
+                        Food.id.in_(requested_ids[start:start + 500])
+                    )
+                ))
+            unknown_ids = sorted(set(requested_ids) - known_ids)
+            if unknown_ids:
+                return False, f"Error logging meals: unknown food id(s) for this user: {', '.join(map(str, unknown_ids))}"
+
+            meal_ids = session.execute(
+                insert(Meal).returning(Meal.id, sort_by_parameter_order=True),
+                [{'user_id': user_id, 'meal_type': meal_type, 'date': meal_date} for meal_type, meal_date, _ in meals]
+            ).scalars().all()
+
+            item_rows = [
+                {'meal_id': meal_id, 'food_id': food_id, 'quantity': quantity}
+                for meal_id, (_, _, food_items) in zip(meal_ids, meals)
+                for food_id, quantity in food_items
+            ]
+            if item_rows:
+                session.execute(insert(MealItem), item_rows)
+
+            refresh_daily_summaries(session.connection(), user_id, [meal_date for _, meal_date, _ in meals])
+            bump_data_version(session.connection(), user_id)
+
+            session.commit()
+            return True, list(meal_ids)
+        except Exception as e:
+            session.rollback()
+            return False, f"Error logging meals: {str(e)}"
+        finally:
+            session.close()
     
+    def _refresh_summaries_for_foods(self, session, user_id, food_ids):
+        """Recompute the daily summaries of every day on which any of the given foods was logged"""
+        affected_dates = set()
+        # Chunked to stay under the database's bound-parameter limit for large CSVs
+        for start in range(0, len(food_ids), 500):
+            affected_dates.update(row.date for row in session.query(Meal.date).join(
+                MealItem, MealItem.meal_id == Meal.id
+            ).filter(
+                and_(
+                    Meal.user_id == user_id,
+                    MealItem.food_id.in_(food_ids[start:start + 500])
+                )
+            ).distinct())
+        refresh_daily_summaries(session.connection(), user_id, affected_dates)
+
+    def rebuild_daily_summaries(self, user_id=None):
+        """Backfill daily summaries from the raw meal logs, for one user or everyone"""
+        session = get_session()
+        try:
+            refresh_daily_summaries(session.connection(), user_id)
+            bump_data_version(session.connection(), user_id)
+            session.commit()
+            return True, "Daily summaries rebuilt successfully"
+        except Exception as e:
+            session.rollback()
+            return False, f"Error rebuilding daily summaries: {str(e)}"
+        finally:
+            session.close()
+
+    def _summary_to_dict(self, summary):
+        return {
+            'protein': round(summary.protein or 0, 2),
+            'carbs': round(summary.carbs or 0, 2),
+            'fat': round(summary.fat or 0, 2),
+            'calories': round(summary.calories or 0, 2)
+        }
+
     def get_daily_nutrition(self, user_id, target_date):
         """Get total nutrition for a specific date"""
         session = get_session()
         try:
-            # Get all meals for the date
-            meals = session.query(Meal).filter(
+            summary = session.query(DailySummary).filter(
                 and_(
-                    Meal.user_id == user_id,
-                    Meal.date == target_date
+                    DailySummary.user_id == user_id,
+                    DailySummary.date == target_date
                 )
-            ).all()
-            
-            total_protein = 0
-            total_carbs = 0
-            total_fat = 0
-            total_calories = 0
-            
-            for meal in meals:
-                for item in meal.items:
-                    food = item.food
-                    total_protein += food.protein * item.quantity
-                    total_carbs += food.carbs * item.quantity
-                    total_fat += food.fat * item.quantity
-                    total_calories += food.calories * item.quantity
-            
-            return {
-                'protein': round(total_protein, 2),
-                'carbs': round(total_carbs, 2),
-                'fat': round(total_fat, 2),
-                'calories': round(total_calories, 2)
-            }
-        except Exception as e:
-            # In a read-only operation, just return default values on error
-            return {'protein': 0, 'carbs': 0, 'fat': 0, 'calories': 0}
+            ).first()
+            if summary is None:
+                return {'protein': 0, 'carbs': 0, 'fat': 0, 'calories': 0}
+            return self._summary_to_dict(summary)
+        finally:
+            session.close()
+
+    def get_nutrition_range(self, user_id, start_date, end_date):
+        """Get total nutrition per day between two dates (inclusive), oldest first.
+        Days without any logged meals are omitted."""
+        session = get_session()
+        try:
+            summaries = session.query(DailySummary).filter(
+                and_(
+                    DailySummary.user_id == user_id,
+                    DailySummary.date >= start_date,
+                    DailySummary.date <= end_date
+                )
+            ).order_by(DailySummary.date).all()
+            return [{'date': summary.date, **self._summary_to_dict(summary)} for summary in summaries]
         finally:
             session.close()
     
-    def get_meal_logs(self, user_id, target_date=None):
-        """Get meal logs for a user, optionally filtered by date"""
+    def _meal_logs_filters(self, user_id, target_date=None, start_date=None, end_date=None):
+        filters = [Meal.user_id == user_id]
+        if target_date:
+            filters.append(Meal.date == target_date)
+        if start_date:
+            filters.append(Meal.date >= start_date)
+        if end_date:
+            filters.append(Meal.date <= end_date)
+        return filters
+
+    def _meal_logs_page_query(self, user_id, target_date=None, start_date=None, end_date=None, limit=None, offset=0):
+        """One page of meals (without items), newest first"""
+        query = select(Meal.id, Meal.meal_type, Meal.date, Meal.created_at).where(
+            *self._meal_logs_filters(user_id, target_date, start_date, end_date)
+        ).order_by(Meal.date.desc(), Meal.created_at.desc(), Meal.id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        if offset:
+            query = query.offset(offset)
+        return query
+
+    def _meal_items_query(self, meal_ids):
+        """The items of the given meals, with their foods' columns"""
+        return select(
+            MealItem.meal_id, MealItem.food_id, MealItem.quantity, *self._food_rows_query().selected_columns
+        ).outerjoin(Food, Food.id == MealItem.food_id).where(
+            MealItem.meal_id.in_(meal_ids)
+        ).order_by(MealItem.id)
+
+    def _build_meal_rows(self, meals, item_rows):
+        """MealRows from page rows and item rows; items of the same food share one FoodRow"""
+        items_by_meal = {meal.id: [] for meal in meals}
+        foods = {}
+        for meal_id, food_id, quantity, *food_columns in item_rows:
+            food = None
+            if food_columns[0] is not None:
+                food = foods.get(food_id)
+                if food is None:
+                    food = foods[food_id] = FoodRow._make(food_columns)
+            items_by_meal[meal_id].append(MealItemRow(food_id, quantity, food))
+        return [MealRow(*meal, items=tuple(items_by_meal[meal.id])) for meal in meals]
+
+    def _count_meal_logs_query(self, user_id, target_date=None, start_date=None, end_date=None):
+        return select(func.count(Meal.id)).where(*self._meal_logs_filters(user_id, target_date, start_date, end_date))
+
+    def get_meal_logs(self, user_id, target_date=None, start_date=None, end_date=None, limit=None, offset=0):
+        """Get meal logs for a user as MealRows, newest first.
+        Optionally filtered by a single date or an inclusive start/end range (YYYY-MM-DD),
+        and paginated with limit/offset."""
         session = get_session()
         try:
-            query = session.query(Meal).options(
-                selectinload(Meal.items).selectinload(MealItem.food)
-            ).filter(Meal.user_id == user_id)
-            
-            if target_date:
-                query = query.filter(Meal.date == target_date)
-            
-            return query.order_by(Meal.date.desc(), Meal.created_at.desc()).all()
+            meals = session.execute(
+                self._meal_logs_page_query(user_id, target_date, start_date, end_date, limit, offset)
+            ).all()
+            if not meals:
+                return []
+            # One query for the items of every meal on the page, with their foods
+            item_rows = session.execute(self._meal_items_query([meal.id for meal in meals]))
+            return self._build_meal_rows(meals, item_rows)
+        finally:
+            session.close()
+
+    def count_meal_logs(self, user_id, target_date=None, start_date=None, end_date=None):
+        """Count meal logs matching the same filters as get_meal_logs"""
+        session = get_session()
+        try:
+            return session.execute(self._count_meal_logs_query(user_id, target_date, start_date, end_date)).scalar_one()
         finally:
             session.close()
     
+    def _food_log_query(self, user_id):
+        """One row per eaten food with its macros scaled by quantity, newest first (FOOD_LOG_COLUMNS)"""
+        return select(
+            Meal.date.label('date'),
+            Meal.meal_type.label('meal_type'),
+            Food.name.label('food_name'),
+            MealItem.quantity.label('quantity'),
+            (Food.protein * MealItem.quantity).label('protein'),
+            (Food.carbs * MealItem.quantity).label('carbs'),
+            (Food.fat * MealItem.quantity).label('fat'),
+            (Food.calories * MealItem.quantity).label('calories'),
+            Meal.created_at.label('logged_at'),
+        ).join(MealItem, MealItem.meal_id == Meal.id).join(
+            # Inner join skips orphaned meal items
+            Food, Food.id == MealItem.food_id
+        ).where(Meal.user_id == user_id).order_by(
+            Meal.date.desc(), Meal.created_at.desc(), Meal.id.desc(), MealItem.id
+        )
+
     def export_meal_logs(self, user_id):
         """Export all meal logs to pandas DataFrame"""
-        # We need to manage the session within this function to ensure
-        # all data is loaded before creating the DataFrame.
         session = get_session()
         try:
-            meals = session.query(Meal).options(
-                selectinload(Meal.items).selectinload(MealItem.food)
-            ).filter(Meal.user_id == user_id).order_by(Meal.date.desc(), Meal.created_at.desc()).all()
+            return pd.read_sql(self._food_log_query(user_id), session.connection(), parse_dates=['logged_at'])
         finally:
             session.close()
-        
-        data = []
-        for meal in meals:
-            for item in meal.items:
-                if item.food: # Safety check for orphaned meal items
-                    data.append({
-                        'date': meal.date,
-                        'meal_type': meal.meal_type,
-                        'food_name': item.food.name,
-                        'quantity': item.quantity,
-                        'protein': item.food.protein * item.quantity,
-                        'carbs': item.food.carbs * item.quantity,
-                        'fat': item.food.fat * item.quantity,
-                        'calories': item.food.calories * item.quantity,
-                        'logged_at': meal.created_at,
-                    })
-        
-        return pd.DataFrame(data)
     
     # Sleep Logging
     def log_sleep(self, user_id, sleep_date, hours, quality, notes=None):
@@ -474,6 +971,7 @@ class MuscleTrackerBackend:
                     notes=notes
                 )
                 session.add(sleep_log)
+            bump_data_version(session.connection(), user_id)
             
             session.commit()
             return True, "Sleep logged successfully"
@@ -483,15 +981,50 @@ class MuscleTrackerBackend:
         finally:
             session.close()
     
-    def get_sleep_logs(self, user_id):
-        """Get sleep logs for a user"""
+    def _sleep_logs_filters(self, user_id, start_date=None, end_date=None):
+        filters = [SleepLog.user_id == user_id]
+        if start_date:
+            filters.append(SleepLog.date >= start_date)
+        if end_date:
+            filters.append(SleepLog.date <= end_date)
+        return filters
+
+    def _sleep_rows_query(self, user_id, start_date=None, end_date=None, limit=None, offset=0):
+        query = select(*(getattr(SleepLog, field) for field in SleepRow._fields)).where(
+            *self._sleep_logs_filters(user_id, start_date, end_date)
+        ).order_by(SleepLog.date.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        if offset:
+            query = query.offset(offset)
+        return query
+
+    def get_sleep_logs(self, user_id, start_date=None, end_date=None, limit=None, offset=0):
+        """Get sleep logs for a user as SleepRows, newest first.
+        Optionally bounded by an inclusive start/end date (YYYY-MM-DD) and paginated with limit/offset."""
+        session = get_session()
+        try:
+            return [SleepRow._make(row) for row in session.execute(
+                self._sleep_rows_query(user_id, start_date, end_date, limit, offset)
+            )]
+        finally:
+            session.close()
+
+    def count_sleep_logs(self, user_id, start_date=None, end_date=None):
+        """Count sleep logs matching the same filters as get_sleep_logs"""
         session = get_session()
         try:
-            return session.query(SleepLog).filter(
-                SleepLog.user_id == user_id
-            ).order_by(SleepLog.date.desc()).all()
+            return session.execute(
+                select(func.count(SleepLog.id)).where(*self._sleep_logs_filters(user_id, start_date, end_date))
+            ).scalar_one()
         finally:
             session.close()
+
+    def get_recent_sleep(self, user_id, days=7, end_date=None):
+        """Sleep logs of the `days` calendar days up to end_date (default today), newest first"""
+        end = date.fromisoformat(end_date) if end_date else date.today()
+        start = end - timedelta(days=days - 1)
+        return self.get_sleep_logs(user_id, start_date=start.isoformat(), end_date=end.isoformat())
     
     def export_sleep_logs(self, user_id):
         """Export all sleep logs to pandas DataFrame"""
@@ -518,36 +1051,126 @@ class MuscleTrackerBackend:
             df_meals_tidy['date'] = pd.to_datetime(df_meals_tidy['date']).dt.date
 
         # --- DataFrame 2: Daily Summary Metrics ---
-        # a) Aggregate daily nutrition from the food log
-        if not df_meals_tidy.empty:
-            df_daily_nutrition = df_meals_tidy.groupby('date').agg(
-                total_protein=('protein', 'sum'),
-                total_carbs=('carbs', 'sum'),
-                total_fat=('fat', 'sum'),
-                total_calories=('calories', 'sum')
-            ).reset_index()
-        else:
-            df_daily_nutrition = pd.DataFrame(columns=['date', 'total_protein', 'total_carbs', 'total_fat', 'total_calories'])
-
-        # b) Get sleep logs
-        df_sleep = self.export_sleep_logs(user_id)
-        if not df_sleep.empty:
-            df_sleep['date'] = pd.to_datetime(df_sleep['date']).dt.date
-            df_sleep.rename(columns={'quality': 'sleep_quality'}, inplace=True)
-            # Only drop 'logged_at' if the DataFrame is not empty
-            df_sleep_to_merge = df_sleep.drop(columns=['logged_at'])
-        else:
-            df_sleep_to_merge = pd.DataFrame(columns=['date', 'hours', 'sleep_quality', 'notes'])
-
-        # c) Merge daily nutrition with sleep logs
-        df_daily_metrics = pd.merge(
-            df_daily_nutrition,
-            df_sleep_to_merge,
-            on='date', how='outer'
-        ).sort_values(by='date', ascending=False)
+        # Daily nutrition and sleep, merged on date by the database
+        session = get_session()
+        try:
+            df_daily_metrics = pd.read_sql(self._daily_metrics_query(user_id), session.connection())
+        finally:
+            session.close()
+        if not df_daily_metrics.empty:
+            df_daily_metrics['date'] = pd.to_datetime(df_daily_metrics['date']).dt.date
         
         return df_meals_tidy, df_daily_metrics
 
+    # Streaming Export
+    def _daily_metrics_query(self, user_id):
+        """One row per day with nutrition or sleep data, newest first (DAILY_METRICS_COLUMNS)"""
+        days = union(
+            select(DailySummary.date.label('date')).where(DailySummary.user_id == user_id),
+            select(SleepLog.date.label('date')).where(SleepLog.user_id == user_id)
+        ).subquery()
+        return select(
+            days.c.date,
+            DailySummary.protein.label('total_protein'),
+            DailySummary.carbs.label('total_carbs'),
+            DailySummary.fat.label('total_fat'),
+            DailySummary.calories.label('total_calories'),
+            SleepLog.hours.label('hours'),
+            SleepLog.quality.label('sleep_quality'),
+            SleepLog.notes.label('notes'),
+        ).select_from(days).outerjoin(
+            DailySummary, and_(DailySummary.user_id == user_id, DailySummary.date == days.c.date)
+        ).outerjoin(
+            SleepLog, and_(SleepLog.user_id == user_id, SleepLog.date == days.c.date)
+        ).order_by(days.c.date.desc())
+
+    def _iter_rows(self, session, statement):
+        """Yield plain tuples from a statement, fetched from the database in batches"""
+        result = session.execute(statement.execution_options(yield_per=HEALTH_EXPORT_BATCH_SIZE))
+        for row in result:
+            yield tuple(row)
+
+    def _write_xlsx_export(self, sheets, output):
+        from openpyxl import Workbook
+        # Write-only mode streams rows to disk instead of building the sheet in memory
+        workbook = Workbook(write_only=True)
+        row_counts = []
+        for sheet_name, columns, rows in sheets:
+            worksheet = workbook.create_sheet(sheet_name)
+            worksheet.append(columns)
+            count = 0
+            for row in rows:
+                worksheet.append(row)
+                count += 1
+            row_counts.append(count)
+        workbook.save(output)
+        return row_counts
+
+    def _write_csv_export(self, sheets, output):
+        row_counts = []
+        with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for sheet_name, columns, rows in sheets:
+                file_name = sheet_name.lower().replace(' ', '_') + '.csv'
+                with archive.open(file_name, 'w') as raw, io.TextIOWrapper(raw, encoding='utf-8', newline='') as text:
+                    writer = csv.writer(text)
+                    writer.writerow(columns)
+                    count = 0
+                    for row in rows:
+                        writer.writerow(row)
+                        count += 1
+                row_counts.append(count)
+        return row_counts
+
+    def _write_parquet_export(self, sheets, output):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        text_columns = {'date', 'meal_type', 'food_name', 'sleep_quality', 'notes'}
+        row_counts = []
+        with tempfile.TemporaryDirectory() as work_dir, zipfile.ZipFile(output, 'w') as archive:
+            for sheet_name, columns, rows in sheets:
+                schema = pa.schema([
+                    (column, pa.string() if column in text_columns
+                     else pa.timestamp('us') if column == 'logged_at' else pa.float64())
+                    for column in columns
+                ])
+                file_name = sheet_name.lower().replace(' ', '_') + '.parquet'
+                path = os.path.join(work_dir, file_name)
+                rows = iter(rows)
+                count = 0
+                with pq.ParquetWriter(path, schema) as writer:
+                    # One row group per batch keeps only HEALTH_EXPORT_BATCH_SIZE rows in memory
+                    for batch in iter(lambda: list(islice(rows, HEALTH_EXPORT_BATCH_SIZE)), []):
+                        writer.write_table(pa.Table.from_pylist([dict(zip(columns, row)) for row in batch], schema=schema))
+                        count += len(batch)
+                archive.write(path, file_name)
+                row_counts.append(count)
+        return row_counts
+
+    def write_health_export(self, user_id, output, file_format='xlsx'):
+        """Stream the food log and daily metrics (nutrition + sleep) into output, a path or binary file.
+
+        'xlsx' writes one workbook with 'Food Log' and 'Daily Metrics' sheets; 'csv' and 'parquet'
+        write a zip archive with one file per table. Rows are fetched and written in batches, so
+        memory use does not grow with the length of the history.
+        Returns (food_log_rows, daily_metrics_rows)."""
+        writers = {
+            'xlsx': self._write_xlsx_export,
+            'csv': self._write_csv_export,
+            'parquet': self._write_parquet_export,
+        }
+        if file_format not in writers:
+            raise ValueError(f"Unsupported export format: {file_format}")
+        session = get_session()
+        try:
+            sheets = [
+                ('Food Log', FOOD_LOG_COLUMNS, self._iter_rows(session, self._food_log_query(user_id))),
+                ('Daily Metrics', DAILY_METRICS_COLUMNS, self._iter_rows(session, self._daily_metrics_query(user_id))),
+            ]
+            food_log_rows, daily_metrics_rows = writers[file_format](sheets, output)
+            return food_log_rows, daily_metrics_rows
+        finally:
+            session.close()
+
     def reset_user_data(self, user_id):
         """Deletes all logs and custom foods for a user, then restores default foods."""
         session = get_session()
@@ -559,6 +1182,9 @@ class MuscleTrackerBackend:
             # Delete Meals
             session.query(Meal).filter(Meal.user_id == user_id).delete(synchronize_session=False)
             
+            # Delete daily summaries
+            session.query(DailySummary).filter(DailySummary.user_id == user_id).delete(synchronize_session=False)
+            
             # Delete SleepLogs
             session.query(SleepLog).filter(SleepLog.user_id == user_id).delete(synchronize_session=False)
             
@@ -567,11 +1193,58 @@ class MuscleTrackerBackend:
             
             # Re-add the default foods
             self._add_default_foods(user_id, session)
+            bump_data_version(session.connection(), user_id, foods=True)
             
             session.commit()
+            _food_cache.invalidate(user_id)
             return True, "All your data has been reset successfully."
         except Exception as e:
             session.rollback()
             return False, f"An error occurred while resetting data: {str(e)}"
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
+
+
+class CachedMuscleTrackerBackend:
+    """Wraps a MuscleTrackerBackend and memoizes its per-user reads in the process-wide read cache.
+
+    Streamlit reruns the whole page on every widget interaction; with this wrapper the reruns
+    are served from memory until a write through the backend changes that user's data.
+    Everything that is not a memoized read is passed straight through."""
+
+    MEMOIZED_READS = (
+        'get_user_foods',
+        'get_daily_nutrition',
+        'get_nutrition_range',
+        'get_meal_logs',
+        'count_meal_logs',
+        'get_sleep_logs',
+        'count_sleep_logs',
+        'get_recent_sleep',
+    )
+
+    def __init__(self, backend=None):
+        self.backend = backend or MuscleTrackerBackend()
+
+    def __getattr__(self, name):
+        attribute = getattr(self.backend, name)
+        if name not in self.MEMOIZED_READS:
+            return attribute
+
+        def memoized(user_id, *args, **kwargs):
+            # Taken before the read, so a write that lands mid-read is never cached under the new version.
+            # It is read from the database, so writes made by other server processes count too.
+            key = (name, user_id, self.backend.get_data_version(user_id), args, tuple(sorted(kwargs.items())))
+            found, result = _read_cache.get(key)
+            if not found:
+                result = attribute(user_id, *args, **kwargs)
+                _read_cache.put(key, result)
+            # Callers get their own list/dict, never the cached one
+            if isinstance(result, (list, dict)):
+                return type(result)(result)
+            return result
+        return memoized
+
+    def read_cache_stats(self):
+        """Hit/miss counters of the memoized reads"""
+        return _read_cache.stats()
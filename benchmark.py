@@ -0,0 +1,544 @@
+"""
+Micro-benchmarks for the Diet Tracker backend.
+
+Usage:
+    python benchmark.py            # run every benchmark
+    python benchmark.py engine     # run only the named benchmark(s)
+    python benchmark.py plans      # fail if any backend query does a full table scan
+
+Every run works on a throwaway SQLite database in a temporary directory,
+so your real muscle_tracker.db is never touched.
+"""
+import os
+import sys
+import tempfile
+import time
+import statistics
+from datetime import date, timedelta
+
+from sqlalchemy import and_, func, select
+
+_bench_dir = tempfile.mkdtemp(prefix="diet_tracker_bench_")
+os.environ.setdefault("MUSCLE_TRACKER_DB_URL", f"sqlite:///{os.path.join(_bench_dir, 'bench.db')}")
+
+import database  # noqa: E402  (must be imported after the database URL is set)
+import backend  # noqa: E402
+from backend import MuscleTrackerBackend  # noqa: E402
+
+
+def _timeit(fn, repeat):
+    """Call fn `repeat` times and return the per-call latencies in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label, timings):
+    print(f"  {label:<32} mean {statistics.mean(timings):8.3f} ms   "
+          f"median {statistics.median(timings):8.3f} ms   n={len(timings)}")
+
+
+def _seed_user(be, username, days=30, meals_per_day=3):
+    """Create a user with the default foods and `days` worth of meals, return the user id"""
+    be.create_user(username, "benchmark")
+    session = database.get_session()
+    try:
+        user = session.query(database.User).filter_by(username=username).one()
+        food_ids = [f.id for f in session.query(database.Food.id).filter_by(user_id=user.id)]
+        user_id = user.id
+    finally:
+        session.close()
+    today = date.today()
+    for d in range(days):
+        day = (today - timedelta(days=d)).isoformat()
+        for m in range(meals_per_day):
+            items = [(food_ids[(d + m + k) % len(food_ids)], 1.0 + k) for k in range(4)]
+            be.log_meal(user_id, "Lunch", day, items)
+    return user_id
+
+
+def bench_engine(repeat=200):
+    """Shared pooled engine vs. building a new engine (plus create_all) on every call"""
+    print("engine: get_daily_nutrition latency")
+    be = MuscleTrackerBackend()
+    user_id = _seed_user(be, "bench_engine")
+    today = date.today().isoformat()
+
+    _report("shared engine + pool", _timeit(lambda: be.get_daily_nutrition(user_id, today), repeat))
+
+    def per_call_session():
+        # Reproduces the old behaviour: a brand-new engine and schema check per call
+        engine = database.create_engine(database.DATABASE_URL, echo=False)
+        database.Base.metadata.create_all(engine)
+        return database.sessionmaker(bind=engine)()
+
+    original = backend.get_session
+    backend.get_session = per_call_session
+    try:
+        _report("engine per call (old)", _timeit(lambda: be.get_daily_nutrition(user_id, today), repeat))
+    finally:
+        backend.get_session = original
+
+
+def _food_csv(rows, name_prefix="Food"):
+    """An in-memory CSV of `rows` synthetic foods, in the import template format"""
+    import io
+    import pandas as pd
+    df = pd.DataFrame({
+        "name": [f"{name_prefix} {i}" for i in range(rows)],
+        "category": [f"Category {i % 25}" for i in range(rows)],
+        "unit": "100g",
+        "protein": [(i % 300) / 10 for i in range(rows)],
+        "carbs": [(i % 800) / 10 for i in range(rows)],
+        "fat": [(i % 200) / 10 for i in range(rows)],
+    })
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    buffer.seek(0)
+    return buffer
+
+
+def bench_import(rows=100_000):
+    """Destructive CSV import of a large nutrient table"""
+    print(f"import: import_foods_from_csv with {rows:,} rows")
+    be = MuscleTrackerBackend()
+    be.create_user("bench_import", "benchmark")
+    ok, user = be.authenticate_user("bench_import", "benchmark")
+    csv_file = _food_csv(rows)
+    start = time.perf_counter()
+    success, result = be.import_foods_from_csv(user.id, csv_file)
+    elapsed = time.perf_counter() - start
+    if not success:
+        sys.exit(result)
+    print(f"  {'bulk import':<32} {elapsed:8.2f} s   ({rows / elapsed:,.0f} rows/s)")
+
+
+def _legacy_upsert(user_id, csv_file_object):
+    """The original per-row upsert (one SELECT per CSV row), kept for comparison"""
+    import pandas as pd
+    from database import Food
+    session = database.get_session()
+    try:
+        df = pd.read_csv(csv_file_object).fillna({"protein": 0.0, "carbs": 0.0, "fat": 0.0, "category": "Other", "unit": "unit"})
+        added_count = updated_count = 0
+        for _, row in df.iterrows():
+            name = str(row["name"]).strip()
+            existing = session.query(Food).filter(
+                and_(Food.user_id == user_id, func.lower(Food.name) == name.lower())
+            ).first()
+            protein, carbs, fat = float(row["protein"]), float(row["carbs"]), float(row["fat"])
+            calories = protein * 4 + carbs * 4 + fat * 9
+            if existing:
+                existing.category, existing.unit = row["category"], row["unit"]
+                existing.protein, existing.carbs, existing.fat, existing.calories = protein, carbs, fat, calories
+                updated_count += 1
+            else:
+                session.add(Food(user_id=user_id, name=name, category=row["category"], unit=row["unit"],
+                                 protein=protein, carbs=carbs, fat=fat, calories=calories))
+                added_count += 1
+        session.commit()
+        return added_count, updated_count
+    finally:
+        session.close()
+
+
+def bench_upsert(sizes=(1_000, 10_000, 100_000)):
+    """Set-based upsert vs. the old one-lookup-per-row path; half of each file updates existing foods"""
+    print("upsert: upsert_foods_from_csv")
+    be = MuscleTrackerBackend()
+    for rows in sizes:
+        timings = {}
+        for label in ("set-based", "per-row (old)"):
+            username = f"bench_upsert_{rows}_{len(timings)}"
+            be.create_user(username, "benchmark")
+            ok, user = be.authenticate_user(username, "benchmark")
+            be.import_foods_from_csv(user.id, _food_csv(rows // 2))
+            csv_file = _food_csv(rows)
+            start = time.perf_counter()
+            if label == "set-based":
+                success, result = be.upsert_foods_from_csv(user.id, csv_file)
+                if not success:
+                    sys.exit(result)
+            else:
+                _legacy_upsert(user.id, csv_file)
+            timings[label] = time.perf_counter() - start
+        print(f"  {rows:>7,} rows   set-based {timings['set-based']:8.2f} s   "
+              f"per-row (old) {timings['per-row (old)']:8.2f} s")
+
+
+def bench_search(rows=100_000, repeat=200):
+    """Ranked food search over a large catalog, once the user's index is built"""
+    print(f"search: search_foods over {rows:,} foods")
+    be = MuscleTrackerBackend()
+    be.create_user("bench_search", "benchmark")
+    ok, user = be.authenticate_user("bench_search", "benchmark")
+    be.import_foods_from_csv(user.id, _food_csv(rows))
+    start = time.perf_counter()
+    be.search_foods(user.id, "warm-up")
+    print(f"  {'index build (first search)':<32} {(time.perf_counter() - start) * 1000:8.1f} ms")
+    # The last rows are worst cases: a category word every food contains, a substring that no
+    # name has but thousands of categories do, and queries too short for trigrams
+    for label, term in (("prefix", "fo"), ("substring", "od 4242"), ("exact", "Food 99999"),
+                        ("category", "category 7"), ("typo", "fod 12345"),
+                        ("worst: category word", "categ"), ("worst: category suffix", "ory 1"),
+                        ("worst: short substring", "99"), ("worst: short miss", "zq")):
+        _report(f"{label} '{term}'", _timeit(lambda: be.search_foods(user.id, term, limit=20), repeat))
+
+
+def _seed_history(user_id, days, meals_per_day=3, items_per_meal=4):
+    """Bulk-insert `days` of meals and sleep logs ending today, then rebuild the daily summaries"""
+    from database import Food, Meal, MealItem, SleepLog
+    from sqlalchemy import insert
+    engine = database.init_db()
+    today = date.today()
+    with engine.begin() as connection:
+        food_ids = [row.id for row in connection.execute(select(Food.id).where(Food.user_id == user_id))]
+        meal_rows = [
+            {"user_id": user_id, "meal_type": ("Breakfast", "Lunch", "Dinner", "Snack")[m % 4],
+             "date": (today - timedelta(days=d)).isoformat()}
+            for d in range(days) for m in range(meals_per_day)
+        ]
+        connection.execute(insert(Meal), meal_rows)
+        meal_ids = [row.id for row in connection.execute(select(Meal.id).where(Meal.user_id == user_id))]
+        connection.execute(insert(MealItem), [
+            {"meal_id": meal_id, "food_id": food_ids[(meal_id + k) % len(food_ids)], "quantity": 1.0 + k / 2}
+            for meal_id in meal_ids for k in range(items_per_meal)
+        ])
+        connection.execute(insert(SleepLog), [
+            {"user_id": user_id, "date": (today - timedelta(days=d)).isoformat(), "hours": 6 + d % 4,
+             "quality": ("Excellent", "Good", "Fair", "Poor")[d % 4], "notes": None if d % 3 else "synthetic"}
+            for d in range(days)
+        ])
+        database.refresh_daily_summaries(connection, user_id)
+        database.bump_data_version(connection, user_id)
+
+
+def _measure(fn):
+    """Run fn once, returning (seconds, peak traced memory in MB)"""
+    import tracemalloc
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def _legacy_export_meal_logs(user_id):
+    """The original ORM-hydrating export_meal_logs, kept for comparison"""
+    import pandas as pd
+    from sqlalchemy.orm import selectinload
+    from database import Meal, MealItem
+    session = database.get_session()
+    try:
+        meals = session.query(Meal).options(
+            selectinload(Meal.items).selectinload(MealItem.food)
+        ).filter(Meal.user_id == user_id).order_by(Meal.date.desc(), Meal.created_at.desc()).all()
+    finally:
+        session.close()
+    return pd.DataFrame([{
+        "date": meal.date, "meal_type": meal.meal_type, "food_name": item.food.name, "quantity": item.quantity,
+        "protein": item.food.protein * item.quantity, "carbs": item.food.carbs * item.quantity,
+        "fat": item.food.fat * item.quantity, "calories": item.food.calories * item.quantity,
+        "logged_at": meal.created_at,
+    } for meal in meals for item in meal.items if item.food])
+
+
+def bench_export(years=5):
+    """Streaming health export vs. building the whole workbook in a BytesIO"""
+    import io
+    import pandas as pd
+    print(f"export: {years} years of daily meal and sleep logs")
+    be = MuscleTrackerBackend()
+    be.create_user("bench_export", "benchmark")
+    ok, user = be.authenticate_user("bench_export", "benchmark")
+    _seed_history(user.id, days=365 * years)
+
+    def in_memory_excel():
+        df_food_log, df_daily_metrics = be.export_combined_logs(user.id)
+        output = io.BytesIO()
+        with pd.ExcelWriter(output, engine="openpyxl") as writer:
+            df_food_log.to_excel(writer, index=False, sheet_name="Food Log")
+            df_daily_metrics.to_excel(writer, index=False, sheet_name="Daily Metrics")
+        output.getvalue()
+
+    def streamed(file_format):
+        def run():
+            with tempfile.TemporaryFile() as export_file:
+                be.write_health_export(user.id, export_file, file_format)
+        return run
+
+    for label, fn in (("food log frame, ORM (old)", lambda: _legacy_export_meal_logs(user.id)),
+                      ("food log frame, read_sql", lambda: be.export_meal_logs(user.id)),
+                      ("excel built in BytesIO", in_memory_excel), ("streamed xlsx", streamed("xlsx")),
+                      ("streamed csv zip", streamed("csv")), ("streamed parquet zip", streamed("parquet"))):
+        try:
+            elapsed, peak = _measure(fn)
+        except ImportError as e:
+            print(f"  {label:<32} skipped ({e})")
+            continue
+        print(f"  {label:<32} {elapsed:8.2f} s   peak {peak:8.1f} MB")
+
+
+def bench_rows(foods=100_000, days=365):
+    """Detached FoodRow/MealRow records vs. loading ORM instances"""
+    from sqlalchemy.orm import selectinload
+    print(f"rows: {foods:,} foods and {days} days of meal logs")
+    be = MuscleTrackerBackend()
+    be.create_user("bench_rows", "benchmark")
+    ok, user = be.authenticate_user("bench_rows", "benchmark")
+    be.import_foods_from_csv(user.id, _food_csv(foods))
+    _seed_history(user.id, days=days)
+
+    def orm_foods():
+        session = database.get_session()
+        try:
+            return session.query(database.Food).filter(database.Food.user_id == user.id).all()
+        finally:
+            session.close()
+
+    def orm_meal_logs():
+        session = database.get_session()
+        try:
+            return session.query(database.Meal).filter(database.Meal.user_id == user.id).options(
+                selectinload(database.Meal.items).selectinload(database.MealItem.food)
+            ).order_by(database.Meal.date.desc()).all()
+        finally:
+            session.close()
+
+    def food_rows():
+        backend._food_cache.invalidate(user.id)
+        return be.get_user_foods(user.id)
+
+    for label, fn in (("foods, ORM (old)", orm_foods), ("foods, FoodRow", food_rows),
+                      ("meal logs, ORM (old)", orm_meal_logs),
+                      ("meal logs, MealRow", lambda: be.get_meal_logs(user.id))):
+        elapsed, peak = _measure(fn)
+        print(f"  {label:<32} {elapsed:8.2f} s   peak {peak:8.1f} MB")
+
+
+def bench_nutrition(days=365, repeat=20):
+    """Per-meal totals for a year of logs: generator sums per meal vs. the NumPy nutrition engine"""
+    print(f"nutrition: per-meal totals over {days} days of meal logs")
+    be = MuscleTrackerBackend()
+    be.create_user("bench_nutrition", "benchmark")
+    ok, user = be.authenticate_user("bench_nutrition", "benchmark")
+    _seed_history(user.id, days=days)
+    meals = be.get_meal_logs(user.id)
+    engine = be.get_nutrition_engine(user.id)
+
+    def generator_sums():
+        return [
+            (sum(item.food.protein * item.quantity for item in meal.items if item.food),
+             sum(item.food.carbs * item.quantity for item in meal.items if item.food),
+             sum(item.food.fat * item.quantity for item in meal.items if item.food),
+             sum(item.food.calories * item.quantity for item in meal.items if item.food))
+            for meal in meals
+        ]
+
+    _report(f"generator sums ({len(meals):,} meals)", _timeit(generator_sums, repeat))
+    _report("engine.meal_totals", _timeit(lambda: engine.meal_totals(meals), repeat))
+    items = [(item.food_id, item.quantity) for meal in meals for item in meal.items]
+    food_ids, quantities = [food_id for food_id, _ in items], [quantity for _, quantity in items]
+    _report("engine.totals (whole range)", _timeit(lambda: engine.totals(food_ids, quantities), repeat))
+
+
+def bench_async(years=3, repeat=50):
+    """Page assembly: the sync backend's reads one after another vs. asyncio.gather on the async backend"""
+    import asyncio
+    try:
+        from async_backend import AsyncMuscleTrackerBackend
+    except ImportError as e:
+        print(f"async: skipped ({e})")
+        return
+    print(f"async: page assembly over {years} years of logs")
+    be = MuscleTrackerBackend()
+    be.create_user("bench_async", "benchmark")
+    ok, user = be.authenticate_user("bench_async", "benchmark")
+    _seed_history(user.id, days=365 * years)
+    day = date.today().isoformat()
+    week_ago = (date.today() - timedelta(days=6)).isoformat()
+    month_ago = (date.today() - timedelta(days=30)).isoformat()
+
+    def sync_dashboard():
+        be.get_daily_nutrition(user.id, day)
+        be.get_nutrition_range(user.id, week_ago, day)
+        be.get_meal_logs(user.id, day)
+
+    def sync_view_logs():
+        be.count_meal_logs(user.id, start_date=month_ago, end_date=day)
+        be.get_meal_logs(user.id, start_date=month_ago, end_date=day, limit=20)
+
+    def sync_export():
+        be.export_meal_logs(user.id)
+        be.export_sleep_logs(user.id)
+        be.get_user_foods(user.id)
+
+    loop = asyncio.new_event_loop()
+    async_be = AsyncMuscleTrackerBackend()
+    try:
+        for label, sync_page, async_page, page_repeat in (
+            ("dashboard", sync_dashboard, lambda: async_be.load_dashboard(user.id, day), repeat),
+            ("view logs", sync_view_logs, lambda: async_be.load_view_logs(user.id, month_ago, day), repeat),
+            ("export frames", sync_export, lambda: async_be.load_export_frames(user.id), max(repeat // 10, 3)),
+        ):
+            _report(f"{label}, sync", _timeit(sync_page, page_repeat))
+            _report(f"{label}, async gather", _timeit(lambda: loop.run_until_complete(async_page()), page_repeat))
+    finally:
+        loop.run_until_complete(async_be.dispose())
+        loop.close()
+
+
+def bench_login(logins=32, threads=8):
+    """Login throughput: one login at a time vs. a burst from concurrent sessions"""
+    from concurrent.futures import ThreadPoolExecutor
+    print(f"login: {logins} logins, bcrypt cost {database.BCRYPT_ROUNDS}, "
+          f"{database.PASSWORD_HASH_WORKERS} hashing workers")
+    be = MuscleTrackerBackend()
+    be.create_user("bench_login", "benchmark")
+
+    def login(_=None):
+        ok, result = be.authenticate_user("bench_login", "benchmark")
+        if not ok:
+            raise RuntimeError(result)
+
+    start = time.perf_counter()
+    for _ in range(logins):
+        login()
+    sequential = time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        start = time.perf_counter()
+        list(pool.map(login, range(logins)))
+        concurrent = time.perf_counter() - start
+
+    print(f"  {'sequential':<32} {logins / sequential:8.1f} logins/s")
+    print(f"  {f'{threads} concurrent sessions':<32} {logins / concurrent:8.1f} logins/s")
+
+
+def _backend_workload(be):
+    """Call every MuscleTrackerBackend method the app uses, as (label, thunk) pairs run in order"""
+    import io
+    username = "bench_plans"
+    today = date.today()
+    days = [(today - timedelta(days=d)).isoformat() for d in range(10)]
+    state = {}
+
+    def login():
+        be.create_user(username, "benchmark")
+        state["user_id"] = be.authenticate_user(username, "benchmark")[1].id
+        state["token"] = be.create_remember_me_token(state["user_id"])
+
+    def upsert():
+        # Changing a logged food's macros also refreshes the summaries of the days it was eaten
+        food = be.get_user_foods(state["user_id"])[0]
+        csv = io.StringIO(f"name,category,unit,protein,carbs,fat\n{food.name},{food.category},100g,1,2,3\nNew food,Other,100g,1,1,1\n")
+        be.upsert_foods_from_csv(state["user_id"], csv)
+
+    def log_meals():
+        food_ids = [food.id for food in be.get_user_foods(state["user_id"])]
+        be.log_meal(state["user_id"], "Lunch", days[0], [(food_ids[0], 1), (food_ids[1], 2)])
+        be.log_meals_bulk(state["user_id"], [("Dinner", day, [(food_ids[2], 1)]) for day in days])
+
+    def export():
+        be.export_combined_logs(state["user_id"])
+        be.write_health_export(state["user_id"], io.BytesIO(), "csv")
+
+    return [
+        ("create_user/authenticate_user/tokens", login),
+        ("validate_remember_me_token", lambda: be.validate_remember_me_token(state["token"])),
+        ("delete_remember_me_token", lambda: be.delete_remember_me_token(state["token"])),
+        ("sweep_expired_tokens", be.sweep_expired_tokens),
+        ("add_food", lambda: be.add_food(state["user_id"], "Plan food", "Other", "100g", 1, 1, 1)),
+        ("get_user_foods", lambda: be.get_user_foods(state["user_id"])),
+        ("log_meal/log_meals_bulk", log_meals),
+        ("upsert_foods_from_csv", upsert),
+        ("get_daily_nutrition", lambda: be.get_daily_nutrition(state["user_id"], days[0])),
+        ("get_nutrition_range", lambda: be.get_nutrition_range(state["user_id"], days[-1], days[0])),
+        ("get_meal_logs by date", lambda: be.get_meal_logs(state["user_id"], days[0])),
+        ("get_meal_logs page", lambda: be.get_meal_logs(state["user_id"], start_date=days[-1], end_date=days[0], limit=5, offset=5)),
+        ("count_meal_logs", lambda: be.count_meal_logs(state["user_id"], start_date=days[-1], end_date=days[0])),
+        ("log_sleep", lambda: [be.log_sleep(state["user_id"], day, 7.5, "Good") for day in days[:2]]),
+        ("get_sleep_logs page", lambda: be.get_sleep_logs(state["user_id"], limit=5, offset=5)),
+        ("count_sleep_logs", lambda: be.count_sleep_logs(state["user_id"])),
+        ("get_recent_sleep", lambda: be.get_recent_sleep(state["user_id"])),
+        ("export_combined_logs/write_health_export", export),
+        ("rebuild_daily_summaries", lambda: be.rebuild_daily_summaries(state["user_id"])),
+        ("reset_user_data", lambda: be.reset_user_data(state["user_id"])),
+    ]
+
+
+def bench_plans():
+    """Capture the SQL that real backend calls run, EXPLAIN each statement and fail on a full table scan"""
+    import re
+    from sqlalchemy import event
+    print("plans: index usage of every statement the backend runs")
+    engine = database.init_db()
+    tables = set(database.Base.metadata.tables)
+    current = {"label": None}
+    captured = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if current["label"] and statement.lstrip().upper().startswith(("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")):
+            if executemany and isinstance(parameters[0], (list, tuple, dict)):
+                parameters = parameters[0]
+            captured.setdefault(statement, (current["label"], parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        for label, call in _backend_workload(MuscleTrackerBackend()):
+            current["label"] = label
+            call()
+    finally:
+        current["label"] = None
+        event.remove(engine, "before_cursor_execute", capture)
+
+    failures = []
+    with engine.connect() as connection:
+        for statement, (label, parameters) in captured.items():
+            cursor = connection.connection.cursor()
+            plan = [row[-1] for row in cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()]
+            cursor.close()
+            table_steps = [step for step in plan if step.startswith(("SCAN", "SEARCH"))]
+            if not table_steps:
+                continue  # e.g. INSERT ... VALUES
+            # A SCAN of a subquery or of a table through an index is fine; a bare table scan is not
+            scans = [step for step in table_steps if re.match(r"SCAN (\w+)", step)
+                     and re.match(r"SCAN (\w+)", step).group(1) in tables and "INDEX" not in step]
+            summary = " ".join(statement.split())[:60]
+            print(f"  {'SCAN' if scans else 'ok  '} {label:<40} {summary}")
+            if scans:
+                print(f"       {' | '.join(table_steps)}")
+                failures.append(f"{label}: {summary}")
+    print(f"  {len(captured)} distinct statements checked")
+    if failures:
+        sys.exit("Full table scans in:\n  " + "\n  ".join(failures))
+
+
+BENCHMARKS = {
+    "engine": bench_engine,
+    "plans": bench_plans,
+    "import": bench_import,
+    "upsert": bench_upsert,
+    "search": bench_search,
+    "export": bench_export,
+    "rows": bench_rows,
+    "nutrition": bench_nutrition,
+    "async": bench_async,
+    "login": bench_login,
+}
+
+
+if __name__ == "__main__":
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        if name not in BENCHMARKS:
+            sys.exit(f"Unknown benchmark '{name}'. Choose from: {', '.join(BENCHMARKS)}")
+    print(f"Benchmark database: {database.DATABASE_URL}")
+    for name in selected:
+        BENCHMARKS[name]()
+    database.dispose_engine()
@@ -0,0 +1,136 @@
+import heapq
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from itertools import chain
+
+# Share of the query's trigrams a food must contain to count as a typo-tolerant match
+FUZZY_MIN_SIMILARITY = 0.4
+
+# Trigrams found in more than this share of a large catalog (e.g. "foo" in "Food 1..N")
+# say little about similarity and are left out of typo-tolerant scoring
+FUZZY_COMMON_TRIGRAM_SHARE = 0.1
+FUZZY_COMMON_TRIGRAM_MIN_FOODS = 100
+
+
+def _trigrams(text):
+    """Trigrams of a lowercased string, padded so that word boundaries count too"""
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FoodSearchIndex:
+    """In-memory trigram and word-prefix index over one user's foods.
+
+    Supports prefix, substring and typo-tolerant matching on food name and category.
+    Results are ranked in tiers, and each tier is only searched if the ones above it
+    did not already fill `limit`:
+      1. exact name, then names starting with the query
+      2. names with a word starting with the query
+      3. names containing the query
+      4. categories containing the query
+      5. names or categories sharing most of the query's trigrams (typos)
+    """
+
+    def __init__(self, foods):
+        self.foods = list(foods)
+        names = [(food.name or '').lower() for food in self.foods]
+        categories = [(food.category or '').lower() for food in self.foods]
+        self._names = names
+        self._categories = categories
+
+        self._by_name = sorted((name, position) for position, name in enumerate(names))
+        self._name_words = sorted(
+            (word, name, position) for position, name in enumerate(names) for word in set(name.split())
+        )
+
+        # Every list below holds food positions in name order, so a scan over one yields
+        # matches already ranked and can stop as soon as `limit` of them are found.
+        # trigram -> foods whose name contains it
+        name_postings = defaultdict(list)
+        # trigram -> foods whose name or category contains it (typo-tolerant scoring)
+        postings = defaultdict(list)
+        # category -> its foods; a catalog has few distinct categories, so they are scanned directly
+        by_category = defaultdict(list)
+        for name, position in self._by_name:
+            name_grams = _trigrams(name)
+            for gram in name_grams:
+                name_postings[gram].append(position)
+            for gram in name_grams | _trigrams(categories[position]):
+                postings[gram].append(position)
+            by_category[categories[position]].append(position)
+        self._name_postings = dict(name_postings)
+        self._postings = dict(postings)
+        self._by_category = dict(by_category)
+
+    def __len__(self):
+        return len(self.foods)
+
+    @staticmethod
+    def _prefix_scan(sorted_entries, query):
+        """Positions of sorted (key, ..., position) entries whose key starts with query, in order"""
+        for index in range(bisect_left(sorted_entries, (query,)), len(sorted_entries)):
+            entry = sorted_entries[index]
+            if not entry[0].startswith(query):
+                break
+            yield entry[-1]
+
+    def _name_substring_matches(self, query):
+        """Positions of foods whose name contains query, in name order"""
+        if len(query) < 3:
+            # Shorter than a trigram: every name containing it has a trigram containing it
+            matching = [positions for gram, positions in self._name_postings.items() if query in gram]
+            return heapq.merge(*matching, key=self._names.__getitem__)
+        # Every name containing the query contains all of its inner trigrams,
+        # so only the rarest trigram's foods need checking.
+        inner = [query[i:i + 3] for i in range(len(query) - 2)]
+        candidates = min((self._name_postings.get(gram, ()) for gram in inner), key=len)
+        return (position for position in candidates if query in self._names[position])
+
+    def _category_substring_matches(self, query):
+        """Positions of foods whose category contains query, in name order"""
+        matching = [positions for category, positions in self._by_category.items() if query in category]
+        return heapq.merge(*matching, key=self._names.__getitem__)
+
+    def _fuzzy_matches(self, query, exclude, count):
+        query_grams = _trigrams(query)
+        common = max(FUZZY_COMMON_TRIGRAM_SHARE * len(self.foods), FUZZY_COMMON_TRIGRAM_MIN_FOODS)
+        informative = [gram for gram in query_grams if len(self._postings.get(gram, ())) <= common] or list(query_grams)
+        shared = Counter(chain.from_iterable(self._postings.get(gram, ()) for gram in informative))
+        threshold = max(2, FUZZY_MIN_SIMILARITY * len(informative))
+        return [position for _, _, position in heapq.nsmallest(count, (
+            (-hits, self._names[position], position)
+            for position, hits in shared.items()
+            if hits >= threshold and position not in exclude
+        ))]
+
+    def search(self, query, limit=20):
+        """Return up to `limit` foods matching `query`, best match first"""
+        query = (query or '').strip().lower()
+        if not query or not self.foods or limit <= 0:
+            return []
+
+        results = []
+        seen = set()
+
+        def add(positions):
+            """Append unseen positions in order; True once the result list is full"""
+            for position in positions:
+                if position not in seen:
+                    seen.add(position)
+                    results.append(position)
+                    if len(results) >= limit:
+                        return True
+            return False
+
+        if add(self._prefix_scan(self._by_name, query)):
+            return [self.foods[p] for p in results]
+        if add(self._prefix_scan(self._name_words, query)):
+            return [self.foods[p] for p in results]
+
+        if add(self._name_substring_matches(query)):
+            return [self.foods[p] for p in results]
+        if add(self._category_substring_matches(query)) or len(query) < 3:
+            return [self.foods[p] for p in results]
+
+        add(self._fuzzy_matches(query, seen, limit - len(results)))
+        return [self.foods[p] for p in results]
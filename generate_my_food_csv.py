@@ -1,17 +1,8 @@
 import pandas as pd
 import os
 
-def generate_my_food_csv():
-    """
-    This script generates a personalized CSV file of common foods,
-    ready to be imported into the Diet Tracker application.
-    
-    You can easily add, remove, or modify the food items in the `my_foods` list
-    to create your own custom diet plan.
-    """
-
-    # --- Customize Your Food List Here ---
-    my_foods = [
+# --- Customize Your Food List Here ---
+MY_FOODS = [
     # 🌾 Grains & Carbs
     {"name": "Kerala rice", "category": "Grains & Carbs", "unit": "100g cooked", "protein": 2.5, "carbs": 28, "fat": 0.3},
     {"name": "Whole wheat roti", "category": "Grains & Carbs", "unit": "1 roti (~50g)", "protein": 4, "carbs": 18, "fat": 1},
@@ -62,11 +53,20 @@ def generate_my_food_csv():
     {"name": "Apple", "category": "Fruits", "unit": "1 medium (~100g)", "protein": 0.3, "carbs": 14, "fat": 0.2},
     {"name": "Grapes", "category": "Fruits", "unit": "100g", "protein": 0.6, "carbs": 17, "fat": 0.2},
 ]
+# --- End of Customization ---
 
-    # --- End of Customization ---
+
+def generate_my_food_csv():
+    """
+    This script generates a personalized CSV file of common foods,
+    ready to be imported into the Diet Tracker application.
+    
+    You can easily add, remove, or modify the food items in the `MY_FOODS` list
+    to create your own custom diet plan.
+    """
 
     # Convert the list of dictionaries to a pandas DataFrame
-    df = pd.DataFrame(my_foods)
+    df = pd.DataFrame(MY_FOODS)
 
     # Define the output filename
     output_filename = "my_personal_food_list.csv"
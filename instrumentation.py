@@ -0,0 +1,237 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import warnings
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sqlalchemy import event
+
+# Set to 0 to skip timing and SQL counting entirely
+INSTRUMENTATION_ENABLED = os.environ.get('MUSCLE_TRACKER_INSTRUMENTATION', '1').lower() not in ('0', 'false', 'no')
+# Append one JSON line per backend call to this file
+METRICS_LOG_PATH = os.environ.get('MUSCLE_TRACKER_METRICS_LOG')
+# Serve Prometheus text metrics on http://127.0.0.1:<port>/metrics
+METRICS_PORT = os.environ.get('MUSCLE_TRACKER_METRICS_PORT')
+
+# A call that runs the same SQL statement this many times is reported as an N+1 offender
+N_PLUS_ONE_THRESHOLD = 5
+
+# Upper bounds (seconds) of the Prometheus latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class CallRecord:
+    """Timing and SQL activity of one backend method call"""
+
+    __slots__ = ('method', 'seconds', 'statements', 'rows', 'error', 'statement_counts')
+
+    def __init__(self, method):
+        self.method = method
+        self.seconds = 0.0
+        self.statements = 0
+        self.rows = 0
+        self.error = None
+        self.statement_counts = Counter()
+
+    def repeated_statements(self):
+        """(statement, times run) for statements run at least N_PLUS_ONE_THRESHOLD times"""
+        return [(statement, count) for statement, count in self.statement_counts.most_common()
+                if count >= N_PLUS_ONE_THRESHOLD]
+
+    def to_dict(self):
+        return {
+            'method': self.method,
+            'seconds': round(self.seconds, 6),
+            'statements': self.statements,
+            'rows': self.rows,
+            'error': self.error,
+            'repeated_statements': [{'statement': s, 'count': c} for s, c in self.repeated_statements()],
+        }
+
+
+class MetricsRegistry:
+    """Process-wide totals per backend method, for the Prometheus endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._methods = {}
+
+    def observe(self, record):
+        with self._lock:
+            totals = self._methods.setdefault(record.method, {
+                'calls': 0, 'errors': 0, 'seconds': 0.0, 'statements': 0, 'rows': 0,
+                'buckets': [0] * len(LATENCY_BUCKETS),
+            })
+            totals['calls'] += 1
+            totals['errors'] += record.error is not None
+            totals['seconds'] += record.seconds
+            totals['statements'] += record.statements
+            totals['rows'] += record.rows
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if record.seconds <= bound:
+                    totals['buckets'][i] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {method: dict(totals, buckets=list(totals['buckets'])) for method, totals in self._methods.items()}
+
+    def prometheus_text(self):
+        lines = [
+            '# HELP muscle_tracker_backend_call_seconds Time spent in MuscleTrackerBackend methods',
+            '# TYPE muscle_tracker_backend_call_seconds histogram',
+        ]
+        snapshot = self.snapshot()
+        for method, totals in sorted(snapshot.items()):
+            for bound, count in zip(LATENCY_BUCKETS, totals['buckets']):
+                lines.append(f'muscle_tracker_backend_call_seconds_bucket{{method="{method}",le="{bound}"}} {count}')
+            lines.append(f'muscle_tracker_backend_call_seconds_bucket{{method="{method}",le="+Inf"}} {totals["calls"]}')
+            lines.append(f'muscle_tracker_backend_call_seconds_sum{{method="{method}"}} {totals["seconds"]:.6f}')
+            lines.append(f'muscle_tracker_backend_call_seconds_count{{method="{method}"}} {totals["calls"]}')
+        for name, key, help_text in (
+            ('errors', 'errors', 'MuscleTrackerBackend calls that raised'),
+            ('sql_statements', 'statements', 'SQL statements executed by MuscleTrackerBackend methods'),
+            ('rows', 'rows', 'Rows returned or written by MuscleTrackerBackend methods'),
+        ):
+            lines.append(f'# HELP muscle_tracker_backend_{name}_total {help_text}')
+            lines.append(f'# TYPE muscle_tracker_backend_{name}_total counter')
+            for method, totals in sorted(snapshot.items()):
+                lines.append(f'muscle_tracker_backend_{name}_total{{method="{method}"}} {totals[key]}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+# Calls in progress in this thread (outermost first) and the calls of the current rerun
+_active_calls = contextvars.ContextVar('active_calls', default=())
+_rerun_calls = contextvars.ContextVar('rerun_calls', default=None)
+_log_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    for record in _active_calls.get():
+        record.statements += 1
+        record.statement_counts[statement] += 1
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Rows written by INSERT/UPDATE/DELETE; SELECT rows are counted from the method's result
+    if cursor.rowcount and cursor.rowcount > 0 and not statement.lstrip().upper().startswith('SELECT'):
+        for record in _active_calls.get():
+            record.rows += cursor.rowcount
+
+
+def instrument_engine(engine):
+    """Count the SQL statements each backend call runs on this engine (safe to call repeatedly)"""
+    if INSTRUMENTATION_ENABLED and not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    return engine
+
+
+def _result_rows(result):
+    """Rows in a method's return value: its length for lists and frames, or a (success, list) tuple's list"""
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], bool):
+        result = result[1]
+    if isinstance(result, list) or hasattr(result, 'shape'):
+        return len(result)
+    return 0
+
+
+def _instrument(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        record = CallRecord(method.__name__)
+        active = _active_calls.get()
+        token = _active_calls.set(active + (record,))
+        start = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+            record.rows += _result_rows(result)
+            return result
+        except Exception as e:
+            record.error = type(e).__name__
+            raise
+        finally:
+            record.seconds = time.perf_counter() - start
+            _active_calls.reset(token)
+            # Nested calls are already part of the outer call's time and statements
+            if not active:
+                _finish(record)
+    return wrapper
+
+
+def _finish(record):
+    metrics.observe(record)
+    rerun_calls = _rerun_calls.get()
+    if rerun_calls is not None:
+        rerun_calls.append(record)
+    if METRICS_LOG_PATH:
+        line = json.dumps(dict(record.to_dict(), timestamp=time.time()))
+        with _log_lock, open(METRICS_LOG_PATH, 'a') as log_file:
+            log_file.write(line + '\n')
+
+
+def instrumented(cls):
+    """Class decorator: time every public method and count its SQL statements and rows"""
+    if not INSTRUMENTATION_ENABLED:
+        return cls
+    for name, attribute in list(vars(cls).items()):
+        if not name.startswith('_') and callable(attribute):
+            setattr(cls, name, _instrument(attribute))
+    return cls
+
+
+def start_rerun():
+    """Start collecting the backend calls made by this thread, e.g. one Streamlit rerun.
+    Returns the list the CallRecords are appended to."""
+    calls = []
+    _rerun_calls.set(calls)
+    return calls
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = metrics.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_metrics_server = None
+_metrics_server_lock = threading.Lock()
+
+
+_metrics_server_failed = False
+
+
+def start_metrics_server(port=None):
+    """Serve /metrics on localhost from a daemon thread, once per process.
+    If the port can't be bound (e.g. another server process on this host already has it),
+    warns once and returns None; the app carries on without the endpoint."""
+    global _metrics_server, _metrics_server_failed
+    port = port or METRICS_PORT
+    if not port:
+        return None
+    with _metrics_server_lock:
+        if _metrics_server is None and not _metrics_server_failed:
+            try:
+                _metrics_server = ThreadingHTTPServer(('127.0.0.1', int(port)), _MetricsHandler)
+            except OSError as e:
+                _metrics_server_failed = True
+                warnings.warn(f"Metrics endpoint disabled in process {os.getpid()}: "
+                              f"can't listen on 127.0.0.1:{port} ({e})", RuntimeWarning)
+                return None
+            threading.Thread(target=_metrics_server.serve_forever, daemon=True).start()
+        return _metrics_server
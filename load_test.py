@@ -0,0 +1,276 @@
+"""
+Load test for the Diet Tracker backend: simulated Streamlit users driving MuscleTrackerBackend.
+
+Usage:
+    python load_test.py                                  # 20 users, 8 threads, 2000 page views
+    python load_test.py --users 50 --workers 16 --processes 2 --page-views 10000
+    python load_test.py --db-url sqlite:///muscle_tracker.db   # seed and load a real database
+
+Synthetic users are seeded first: every user gets the default foods, the foods from
+generate_my_food_csv.py plus variants of them up to --foods, and --years of meals and
+sleep logs. Users that already exist are reused, so a database only has to be seeded once.
+Each worker then replays page views in PAGE_MIX proportions and records how long every
+backend call takes. Unless --db-url is given, everything runs on a throwaway database.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, timedelta
+from multiprocessing import get_context
+
+USERNAME_PREFIX = "loadtest_user_"
+PASSWORD = "loadtest"
+
+# Relative frequency of each page, roughly how the app is used day to day
+PAGE_MIX = {
+    "dashboard": 45,
+    "log_meal": 25,
+    "view_logs": 20,
+    "sleep_log": 5,
+    "export": 5,
+}
+
+
+def _seed_foods(be, user_id, food_count):
+    """Top the user's catalog up to food_count with the personal food list and variants of it"""
+    import io
+    import pandas as pd
+    from generate_my_food_csv import MY_FOODS
+    existing = len(be.get_user_foods(user_id))
+    foods = []
+    for i in range(max(food_count - existing, 0)):
+        food = dict(MY_FOODS[i % len(MY_FOODS)])
+        variant = i // len(MY_FOODS)
+        if variant:
+            scale = 1 + variant / 10
+            food.update(name=f"{food['name']} (variant {variant})", protein=round(food["protein"] * scale, 1),
+                        carbs=round(food["carbs"] * scale, 1), fat=round(food["fat"] * scale, 1))
+        foods.append(food)
+    if foods:
+        csv_file = io.StringIO(pd.DataFrame(foods).to_csv(index=False))
+        success, result = be.upsert_foods_from_csv(user_id, csv_file)
+        if not success:
+            raise RuntimeError(result)
+
+
+def _seed_history(user_id, days, rng):
+    """Bulk-insert `days` of random meals and sleep logs ending today, then rebuild the daily summaries"""
+    import database
+    from database import Food, Meal, MealItem, SleepLog
+    from sqlalchemy import insert, select
+    today = date.today()
+    with database.init_db().begin() as connection:
+        food_ids = [row.id for row in connection.execute(select(Food.id).where(Food.user_id == user_id))]
+        meals = []
+        for d in range(days):
+            meal_date = (today - timedelta(days=d)).isoformat()
+            for meal_type in rng.sample(["Breakfast", "Lunch", "Dinner", "Snack"], rng.randint(2, 4)):
+                meals.append((meal_type, meal_date, [(rng.choice(food_ids), rng.choice([0.5, 1, 1.5, 2, 3]))
+                                                     for _ in range(rng.randint(1, 5))]))
+        meal_ids = connection.execute(
+            insert(Meal).returning(Meal.id, sort_by_parameter_order=True),
+            [{"user_id": user_id, "meal_type": meal_type, "date": meal_date} for meal_type, meal_date, _ in meals]
+        ).scalars().all()
+        connection.execute(insert(MealItem), [
+            {"meal_id": meal_id, "food_id": food_id, "quantity": quantity}
+            for meal_id, (_, _, items) in zip(meal_ids, meals) for food_id, quantity in items
+        ])
+        connection.execute(insert(SleepLog), [
+            {"user_id": user_id, "date": (today - timedelta(days=d)).isoformat(), "hours": rng.choice([5, 6, 6.5, 7, 7.5, 8, 9]),
+             "quality": rng.choice(["Excellent", "Good", "Fair", "Poor"]), "notes": rng.choice([None, None, "late dinner"])}
+            for d in range(days)
+        ])
+        database.refresh_daily_summaries(connection, user_id)
+        database.bump_data_version(connection, user_id)
+
+
+def seed(users, foods, years, seed_value):
+    """Create the synthetic users that don't exist yet and return every load-test user id"""
+    import database
+    from backend import MuscleTrackerBackend
+    from sqlalchemy import select
+    be = MuscleTrackerBackend()
+    for i in range(users):
+        username = f"{USERNAME_PREFIX}{i}"
+        success, _ = be.create_user(username, PASSWORD)
+        if not success:
+            continue  # already seeded by an earlier run
+        with database.init_db().connect() as connection:
+            user_id = connection.execute(select(database.User.id).where(database.User.username == username)).scalar_one()
+        _seed_foods(be, user_id, foods)
+        _seed_history(user_id, int(365 * years), random.Random(seed_value + i))
+        print(f"  seeded {username}")
+    with database.init_db().connect() as connection:
+        return [row.id for row in connection.execute(
+            select(database.User.id).where(database.User.username.like(f"{USERNAME_PREFIX}%")).order_by(database.User.id)
+        )][:users]
+
+
+class _Recorder:
+    """Collects the latency of every backend call and page view made by one worker"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def call(self, be, method, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return getattr(be, method)(*args, **kwargs)
+        finally:
+            self.latencies[method].append(time.perf_counter() - start)
+
+
+def _dashboard(be, record, user_id, rng, day):
+    record.call(be, "get_daily_nutrition", user_id, day.isoformat())
+    record.call(be, "get_nutrition_range", user_id, (day - timedelta(days=6)).isoformat(), day.isoformat())
+    meals = record.call(be, "get_meal_logs", user_id, day.isoformat())
+    record.call(be, "get_nutrition_engine", user_id).meal_totals(meals)
+
+
+def _log_meal(be, record, user_id, rng, day):
+    foods = record.call(be, "get_user_foods", user_id)
+    term = rng.choice(foods).name[:rng.randint(2, 5)]
+    results = record.call(be, "search_foods", user_id, term) or foods
+    items = [(rng.choice(results).id, rng.choice([0.5, 1, 2])) for _ in range(rng.randint(1, 4))]
+    record.call(be, "get_nutrition_engine", user_id).totals([food_id for food_id, _ in items], [q for _, q in items])
+    success, message = record.call(be, "log_meal", user_id, rng.choice(["Breakfast", "Lunch", "Dinner", "Snack"]),
+                                   date.today().isoformat(), items)
+    if not success:
+        raise RuntimeError(message)
+
+
+def _view_logs(be, record, user_id, rng, day):
+    start_date, end_date = (day - timedelta(days=30)).isoformat(), day.isoformat()
+    total = record.call(be, "count_meal_logs", user_id, start_date=start_date, end_date=end_date)
+    page = rng.randrange(max(1, (total + 19) // 20))
+    meals = record.call(be, "get_meal_logs", user_id, start_date=start_date, end_date=end_date, limit=20, offset=page * 20)
+    record.call(be, "get_nutrition_engine", user_id).meal_totals(meals)
+
+
+def _sleep_log(be, record, user_id, rng, day):
+    record.call(be, "get_recent_sleep", user_id, 7, end_date=date.today().isoformat())
+    total = record.call(be, "count_sleep_logs", user_id)
+    page = rng.randrange(max(1, (total + 29) // 30))
+    record.call(be, "get_sleep_logs", user_id, limit=30, offset=page * 30)
+
+
+def _export(be, record, user_id, rng, day):
+    with tempfile.TemporaryFile() as export_file:
+        record.call(be, "write_health_export", user_id, export_file, "csv")
+
+
+PAGES = {
+    "dashboard": _dashboard,
+    "log_meal": _log_meal,
+    "view_logs": _view_logs,
+    "sleep_log": _sleep_log,
+    "export": _export,
+}
+
+
+def _run_worker(be, user_ids, page_views, days, seed_value):
+    rng = random.Random(seed_value)
+    record = _Recorder()
+    pages, weights = list(PAGE_MIX), list(PAGE_MIX.values())
+    for _ in range(page_views):
+        page = rng.choices(pages, weights)[0]
+        day = date.today() - timedelta(days=rng.randrange(max(days, 1)))
+        start = time.perf_counter()
+        try:
+            PAGES[page](be, record, rng.choice(user_ids), rng, day)
+        except Exception:
+            record.errors[page] += 1
+        record.latencies[f"page:{page}"].append(time.perf_counter() - start)
+    return dict(record.latencies), dict(record.errors)
+
+
+def _run_process(user_ids, threads, page_views, days, seed_value, read_cache):
+    """Run `threads` workers sharing one backend, as one Streamlit server process would"""
+    from backend import CachedMuscleTrackerBackend, MuscleTrackerBackend
+    be = CachedMuscleTrackerBackend() if read_cache else MuscleTrackerBackend()
+    latencies, errors = defaultdict(list), defaultdict(int)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [
+            pool.submit(_run_worker, be, user_ids, page_views // threads + (t < page_views % threads), days, seed_value + t)
+            for t in range(threads)
+        ]
+        for future in futures:
+            worker_latencies, worker_errors = future.result()
+            for name, values in worker_latencies.items():
+                latencies[name].extend(values)
+            for name, count in worker_errors.items():
+                errors[name] += count
+    return dict(latencies), dict(errors)
+
+
+def report(latencies, errors, elapsed):
+    import numpy as np
+    print(f"\n{'call':<28} {'calls':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'calls/s':>9} {'errors':>7}")
+    for name in sorted(latencies, key=lambda n: (n.startswith("page:"), n)):
+        values = np.array(latencies[name]) * 1000
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        page_errors = errors.get(name.split(":", 1)[1], 0) if name.startswith("page:") else ""
+        print(f"{name:<28} {len(values):>7} {p50:>9.2f} {p95:>9.2f} {p99:>9.2f} {len(values) / elapsed:>9.1f} {page_errors:>7}")
+    print(f"\n{sum(len(v) for n, v in latencies.items() if n.startswith('page:'))} page views in {elapsed:.1f} s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="synthetic users to seed and load (default: 20)")
+    parser.add_argument("--foods", type=int, default=200, help="foods per user (default: 200)")
+    parser.add_argument("--years", type=float, default=2, help="years of meal and sleep history per user (default: 2)")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent sessions (threads) per process (default: 8)")
+    parser.add_argument("--processes", type=int, default=1, help="server processes (default: 1)")
+    parser.add_argument("--page-views", type=int, default=2000, help="total page views to replay (default: 2000)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed, for reproducible runs (default: 42)")
+    parser.add_argument("--db-url", help="database to seed and load instead of a throwaway SQLite file")
+    parser.add_argument("--no-read-cache", action="store_true", help="call MuscleTrackerBackend without the read cache")
+    args = parser.parse_args(argv)
+
+    # Configure the database before the backend is imported, here and in spawned processes
+    os.environ["MUSCLE_TRACKER_DB_URL"] = args.db_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(prefix="diet_tracker_load_"), "load.db")
+    os.environ.setdefault("MUSCLE_TRACKER_BCRYPT_ROUNDS", "4")  # seeding users shouldn't be dominated by bcrypt
+    import database
+
+    print(f"Load test database: {database.DATABASE_URL}")
+    print(f"Seeding {args.users} users, {args.foods} foods each, {args.years:g} years of logs")
+    start = time.perf_counter()
+    user_ids = seed(args.users, args.foods, args.years, args.seed)
+    print(f"Seeded in {time.perf_counter() - start:.1f} s")
+    database.dispose_engine()
+
+    days = int(365 * args.years)
+    per_process = [args.page_views // args.processes + (p < args.page_views % args.processes) for p in range(args.processes)]
+    print(f"Replaying {args.page_views} page views: {args.processes} process(es) x {args.workers} session(s)")
+    start = time.perf_counter()
+    if args.processes == 1:
+        results = [_run_process(user_ids, args.workers, per_process[0], days, args.seed, not args.no_read_cache)]
+    else:
+        with ProcessPoolExecutor(max_workers=args.processes, mp_context=get_context("spawn")) as pool:
+            results = list(pool.map(
+                _run_process, [user_ids] * args.processes, [args.workers] * args.processes, per_process,
+                [days] * args.processes, [args.seed + 1000 * p for p in range(args.processes)],
+                [not args.no_read_cache] * args.processes
+            ))
+    elapsed = time.perf_counter() - start
+
+    latencies, errors = defaultdict(list), defaultdict(int)
+    for process_latencies, process_errors in results:
+        for name, values in process_latencies.items():
+            latencies[name].extend(values)
+        for name, count in process_errors.items():
+            errors[name] += count
+    report(latencies, errors, elapsed)
+    database.dispose_engine()
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
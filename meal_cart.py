@@ -0,0 +1,162 @@
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+# Where meal builder carts live: 'memory' (this process) or 'sqlite' (a file every
+# server process can share); the default file lives next to this module whatever the
+# working directory
+CART_STORE = os.environ.get('MUSCLE_TRACKER_CART_STORE', 'memory')
+CART_DB_PATH = os.environ.get(
+    'MUSCLE_TRACKER_CART_DB_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'meal_carts.db')
+)
+# Carts untouched for this long (e.g. of sessions that ended without logging out) are dropped
+CART_TTL_SECONDS = int(os.environ.get('MUSCLE_TRACKER_CART_TTL_SECONDS', '86400'))
+# Expired carts are swept on a save at most this often
+CART_SWEEP_INTERVAL_SECONDS = 60
+
+
+class MealCart:
+    """The foods picked in the meal builder, as parallel (food_id, quantity) arrays.
+
+    About 16 bytes per item, whatever the size of the user's catalog; food details are
+    looked up by id when the cart is shown."""
+
+    __slots__ = ('food_ids', 'quantities')
+
+    def __init__(self, food_ids=(), quantities=()):
+        self.food_ids = array('q', food_ids)
+        self.quantities = array('d', quantities)
+
+    def __len__(self):
+        return len(self.food_ids)
+
+    def __iter__(self):
+        return zip(self.food_ids, self.quantities)
+
+    def add(self, food_id, quantity):
+        self.food_ids.append(food_id)
+        self.quantities.append(quantity)
+
+    def remove(self, index):
+        del self.food_ids[index]
+        del self.quantities[index]
+
+    def to_bytes(self):
+        return self.food_ids.tobytes(), self.quantities.tobytes()
+
+    @classmethod
+    def from_bytes(cls, food_ids, quantities):
+        cart = cls()
+        cart.food_ids.frombytes(food_ids)
+        cart.quantities.frombytes(quantities)
+        return cart
+
+
+class InMemoryCartStore:
+    """Carts kept in this server process, keyed by session"""
+
+    def __init__(self, ttl=CART_TTL_SECONDS):
+        self.ttl = ttl
+        self._carts = {}  # key -> (food_ids bytes, quantities bytes, updated_at)
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def load(self, key):
+        with self._lock:
+            stored = self._carts.get(key)
+        if stored is None or time.monotonic() - stored[2] > self.ttl:
+            return MealCart()
+        return MealCart.from_bytes(stored[0], stored[1])
+
+    def save(self, key, cart):
+        now = time.monotonic()
+        with self._lock:
+            if len(cart):
+                self._carts[key] = (*cart.to_bytes(), now)
+            else:
+                self._carts.pop(key, None)
+            if now - self._last_sweep > CART_SWEEP_INTERVAL_SECONDS:
+                self._last_sweep = now
+                for expired in [k for k, stored in self._carts.items() if now - stored[2] > self.ttl]:
+                    del self._carts[expired]
+
+    def delete(self, key):
+        with self._lock:
+            self._carts.pop(key, None)
+
+
+class SQLiteCartStore:
+    """Carts in a small SQLite key-value file, so several server processes can share them"""
+
+    def __init__(self, path, ttl=CART_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self._last_sweep = 0.0
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS meal_carts ("
+                "cart_key TEXT PRIMARY KEY, food_ids BLOB NOT NULL, quantities BLOB NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def load(self, key):
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                "SELECT food_ids, quantities FROM meal_carts WHERE cart_key = ? AND updated_at >= ?",
+                (str(key), time.time() - self.ttl)
+            ).fetchone()
+        finally:
+            connection.close()
+        return MealCart.from_bytes(*row) if row else MealCart()
+
+    def save(self, key, cart):
+        if not len(cart):
+            self.delete(key)
+            return
+        now = time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO meal_carts (cart_key, food_ids, quantities, updated_at) VALUES (?, ?, ?, ?)",
+                    (str(key), *cart.to_bytes(), now)
+                )
+                if now - self._last_sweep > CART_SWEEP_INTERVAL_SECONDS:
+                    self._last_sweep = now
+                    connection.execute("DELETE FROM meal_carts WHERE updated_at < ?", (now - self.ttl,))
+        finally:
+            connection.close()
+
+    def delete(self, key):
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM meal_carts WHERE cart_key = ?", (str(key),))
+        finally:
+            connection.close()
+
+
+_cart_store = None
+_cart_store_lock = threading.Lock()
+
+
+def get_cart_store():
+    """The process-wide cart store selected by MUSCLE_TRACKER_CART_STORE"""
+    global _cart_store
+    with _cart_store_lock:
+        if _cart_store is None:
+            if CART_STORE == 'memory':
+                _cart_store = InMemoryCartStore()
+            elif CART_STORE == 'sqlite':
+                _cart_store = SQLiteCartStore(CART_DB_PATH)
+            else:
+                raise ValueError(f"Unknown MUSCLE_TRACKER_CART_STORE: {CART_STORE}")
+        return _cart_store
@@ -0,0 +1,59 @@
+import numpy as np
+
+NUTRIENTS = ('protein', 'carbs', 'fat', 'calories')
+
+
+class NutritionEngine:
+    """One user's foods as a (foods x NUTRIENTS) NumPy matrix, indexed by food id.
+
+    A meal, a day or any range of logs is a list of (food_id, quantity) pairs, and its totals
+    are one product of the quantities with the matching matrix rows. Food ids that are not in
+    the catalog (e.g. foods removed by a CSV import) count as zero, like the UI always did.
+    """
+
+    def __init__(self, foods):
+        foods = list(foods)
+        self.food_ids = np.array([food.id for food in foods], dtype=np.int64)
+        order = np.argsort(self.food_ids)
+        self.food_ids = self.food_ids[order]
+        matrix = np.array(
+            [[getattr(food, nutrient) for nutrient in NUTRIENTS] for food in foods], dtype=np.float64
+        ).reshape(len(foods), len(NUTRIENTS))
+        # The extra all-zero last row is where unknown food ids point
+        self.matrix = np.vstack([np.nan_to_num(matrix[order]), np.zeros(len(NUTRIENTS))])
+
+    def __len__(self):
+        return len(self.food_ids)
+
+    def rows(self, food_ids):
+        """Matrix row of each food id, or the zero row for ids not in the catalog"""
+        food_ids = np.asarray(food_ids, dtype=np.int64)
+        if len(self.food_ids) == 0:
+            return np.zeros(len(food_ids), dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.food_ids, food_ids), len(self.food_ids) - 1)
+        return np.where(self.food_ids[positions] == food_ids, positions, len(self.food_ids))
+
+    def totals(self, food_ids, quantities):
+        """Totals of (food_id, quantity) pairs as a {nutrient: value} dict"""
+        if len(food_ids) == 0:
+            return dict.fromkeys(NUTRIENTS, 0.0)
+        vector = np.asarray(quantities, dtype=np.float64) @ self.matrix[self.rows(food_ids)]
+        return dict(zip(NUTRIENTS, vector.tolist()))
+
+    def group_totals(self, groups, food_ids, quantities, group_count):
+        """Totals per group for pairs labelled 0..group_count-1, as a (group_count x NUTRIENTS) array"""
+        result = np.zeros((group_count, len(NUTRIENTS)))
+        if len(food_ids):
+            contributions = self.matrix[self.rows(food_ids)] * np.asarray(quantities, dtype=np.float64)[:, None]
+            np.add.at(result, np.asarray(groups, dtype=np.int64), contributions)
+        return result
+
+    def meal_totals(self, meals):
+        """A {nutrient: value} dict for each of the given MealRows, in order"""
+        groups, food_ids, quantities = [], [], []
+        for group, meal in enumerate(meals):
+            for item in meal.items:
+                groups.append(group)
+                food_ids.append(item.food_id)
+                quantities.append(item.quantity or 0)
+        return [dict(zip(NUTRIENTS, row)) for row in self.group_totals(groups, food_ids, quantities, len(meals)).tolist()]
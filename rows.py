@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
+
+# Plain read-only records returned by the backend instead of ORM instances.
+# They hold no session, identity map or lazy loaders, so they can be cached and shared
+# between Streamlit sessions. Each field has the same name as its database column,
+# so a row is built straight from a SELECT of those columns, e.g. FoodRow._make(row).
+
+
+class FoodRow(NamedTuple):
+    id: int
+    name: str
+    category: Optional[str]
+    unit: Optional[str]
+    protein: float
+    carbs: float
+    fat: float
+    calories: float
+
+
+class MealItemRow(NamedTuple):
+    food_id: int
+    quantity: float
+    food: Optional[FoodRow]
+
+
+class MealRow(NamedTuple):
+    id: int
+    meal_type: str
+    date: str
+    created_at: Optional[datetime]
+    items: Tuple[MealItemRow, ...]
+
+
+class SleepRow(NamedTuple):
+    id: int
+    date: str
+    hours: float
+    quality: Optional[str]
+    notes: Optional[str]
+    created_at: Optional[datetime]